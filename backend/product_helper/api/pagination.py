@@ -0,0 +1,51 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+CURSOR_MODE = 'cursor'
+CURSOR_CONFLICT_MESSAGE = ('Курсорная пагинация упорядочивает по id и '
+                           'несовместима с параметрами: {params}')
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset-пагинация по -id: без OFFSET и без COUNT(*)."""
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class OptionalCursorPaginationMixin:
+    """Курсорная пагинация для действий cursor_pagination_actions
+    по запросу ?pagination=cursor (ссылки next/previous сохраняют
+    параметр). Без него используется пагинация из настроек."""
+    cursor_pagination_class = IdCursorPagination
+    cursor_pagination_actions = ('list',)
+    # Параметры со своим порядком выдачи, который курсор по -id потерял
+    # бы: вместе с ?pagination=cursor они дают 400
+    cursor_conflicting_params = ()
+
+    def use_cursor_pagination(self):
+        query_params = self.request.query_params
+        if not (
+            self.action in self.cursor_pagination_actions
+            and (query_params.get('pagination') == CURSOR_MODE
+                 or self.cursor_pagination_class.cursor_query_param
+                 in query_params)
+        ):
+            return False
+        conflicting = [
+            param for param in self.cursor_conflicting_params
+            if query_params.get(param)
+        ]
+        if conflicting:
+            raise ValidationError({
+                'pagination': CURSOR_CONFLICT_MESSAGE.format(
+                    params=', '.join(conflicting)
+                )
+            })
+        return True
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
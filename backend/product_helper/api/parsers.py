@@ -0,0 +1,83 @@
+import codecs
+import json
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser, MultiPartParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большой запрос.'
+    default_code = 'request_too_large'
+
+
+class BodySizeLimitMixin:
+    """Отклоняет запрос с Content-Length больше API_MAX_BODY_BYTES
+    до чтения тела."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > settings.API_MAX_BODY_BYTES:
+            raise RequestTooLarge()
+        return super().parse(stream, media_type, parser_context)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson, если он установлен и тело в UTF-8.
+
+    Тело, которое orjson не разобрал, читает стандартный JSONParser:
+    результат и текст ошибки те же. Целые вне int64/uint64 новые версии
+    orjson читают как float, IntegerField отклоняет их с ошибкой 400.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(content), media_type,
+                                 parser_context)
+
+
+class LimitedJSONParser(BodySizeLimitMixin, FastJSONParser):
+    pass
+
+
+class MultiPartJSONParser(BodySizeLimitMixin, MultiPartParser):
+    """multipart/form-data, где поля объекта приходят JSON-строкой в части
+    data, а файлы (например, image) - отдельными частями. Без части data
+    работает как обычный MultiPartParser.
+
+    Файлы Django пишет во временные файлы по мере чтения запроса.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        payload = result.data.get('data')
+        if payload is None:
+            return result
+        try:
+            data = json.loads(payload)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+        if not isinstance(data, dict):
+            raise ParseError('JSON в части data должен быть объектом.')
+        data.update(result.files.dict())
+        return data
@@ -0,0 +1,93 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+
+from recipes.counters import change_counter, count_of
+
+
+class RelationToggle:
+    """Идемпотентная связь пользователя с объектами: избранное, список
+    покупок, подписки.
+
+    Счетчик counter_field модели counter_model меняется F()-обновлением
+    на число добавленных или удаленных строк:
+    - одна связь добавляется save(), а счетчик в той же транзакции
+      увеличивает обработчик post_save (см. recipes/signals.py);
+    - пачка - bulk_create и UPDATE счетчиков в одной транзакции;
+    - удаление - один DELETE (у моделей связей нет обработчиков
+      удаления) и UPDATE счетчиков в одной транзакции.
+    Связь, которую успел добавить параллельный запрос, счетчик не
+    меняет.
+    """
+
+    def __init__(self, model, field, counter_model, counter_field):
+        self.model = model
+        self.field = field
+        self.counter_model = counter_model
+        self.counter_field = counter_field
+
+    def rows(self, user, ids=None):
+        rows = self.model.objects.filter(user=user)
+        if ids is not None:
+            rows = rows.filter(**{f'{self.field}_id__in': ids})
+        return rows
+
+    def existing(self, user, ids):
+        return set(self.rows(user, ids).values_list(
+            f'{self.field}_id', flat=True
+        ))
+
+    def exists(self, user):
+        """Аннотация связи объекта с user, чтобы узнать о ней в запросе
+        самого объекта."""
+        return Exists(self.model.objects.filter(
+            user=user, **{self.field: OuterRef('pk')}
+        ))
+
+    def change_counters(self, ids, delta):
+        change_counter(
+            self.counter_model.objects.filter(pk__in=ids),
+            self.counter_field, delta
+        )
+
+    def add(self, user, ids, existing=(), **fields):
+        """Связывает user с ids, которых нет в existing, а у уже
+        связанных обновляет fields. Возвращает добавленные id."""
+        added = [pk for pk in ids if pk not in existing]
+        kept = [pk for pk in ids if pk in existing]
+        objs = [
+            self.model(user=user, **fields, **{f'{self.field}_id': pk})
+            for pk in added
+        ]
+        try:
+            if objs:
+                with transaction.atomic():
+                    if len(objs) == 1:
+                        objs[0].save(force_insert=True)
+                    else:
+                        self.model.objects.bulk_create(objs)
+                        self.change_counters(added, 1)
+        except IntegrityError:
+            # Часть связей добавил параллельный запрос после проверки
+            fresh = self.existing(user, ids)
+            if not fresh.difference(existing):
+                raise
+            return self.add(user, ids, fresh, **fields)
+        if fields and kept:
+            self.rows(user, kept).update(**fields)
+        return added
+
+    def remove(self, user, ids):
+        """Удаляет связи user с ids. Возвращает число удаленных."""
+        with transaction.atomic():
+            deleted, _ = self.rows(user, ids).delete()
+            if deleted == len(ids):
+                self.change_counters(ids, -1)
+            elif deleted:
+                # Часть связей удалил параллельный запрос, а какие
+                # именно - DELETE не сообщает
+                self.counter_model.objects.filter(pk__in=ids).update(**{
+                    self.counter_field: count_of(
+                        self.model.objects.all(), self.field
+                    )
+                })
+        return deleted
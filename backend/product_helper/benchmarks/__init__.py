@@ -0,0 +1,60 @@
+"""Бенчмарки. В testpaths не входят, запускаются отдельно:
+
+    python -m pytest benchmarks -s
+
+BENCHMARK_SCALE - доля размеров данных из постановки задач: 1 - полные
+размеры (100 тыс. рецептов, 1 млн строк TagRecipe), по умолчанию 0.01
+для быстрого прогона. База та же, что у тестов (tests/settings.py).
+"""
+import os
+import time
+import tracemalloc
+
+SCALE = float(os.getenv('BENCHMARK_SCALE', '0.01'))
+
+
+def sized(count):
+    """Размер данных count с учетом BENCHMARK_SCALE."""
+    return max(1, int(count * SCALE))
+
+
+def bulk_recipes(author, count, start=1):
+    """count рецептов author с id от start, без сигналов сохранения."""
+    from recipes.models import Recipe
+    return Recipe.objects.bulk_create(
+        Recipe(
+            pk=pk, author=author, name=f'Рецепт {pk}', text='Текст',
+            cooking_time=10, image='recipes/images/recipe.png'
+        )
+        for pk in range(start, start + count)
+    )
+
+
+def measure(func, repeat=5):
+    """(лучшее время вызова func в мс, результат последнего вызова)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func):
+    """(пик памяти Python за вызов func в байтах, результат)."""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def report(name, **values):
+    print('\n{}: {}'.format(name, ', '.join(
+        f'{key}={value:.2f}' if isinstance(value, float)
+        else f'{key}={value}'
+        for key, value in values.items()
+    )))
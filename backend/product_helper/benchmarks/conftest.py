@@ -0,0 +1,3 @@
+from tests.conftest import (author, client, clear_caches,  # noqa: F401
+                            count_queries, ingredients, make_recipes, tags,
+                            user, user_client)
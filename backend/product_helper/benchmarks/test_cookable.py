@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from benchmarks import bulk_recipes, measure, report, sized
+from recipes.cookable import cookable_recipes, coverage_index
+from recipes.models import Ingredient, IngredientRecipe
+
+INGREDIENTS = 2000
+INGREDIENTS_PER_RECIPE = 8
+ON_HAND = 10
+LIMIT = 10
+# Цель из постановки задачи для 100 тыс. рецептов на одном ядре
+BUDGET_MS = 50
+
+
+@pytest.mark.django_db
+def test_cookable(client, author):
+    Ingredient.objects.bulk_create(
+        Ingredient(pk=pk, name=f'Ингредиент {pk}', measurement_unit='G')
+        for pk in range(1, INGREDIENTS + 1)
+    )
+    recipes = bulk_recipes(author, sized(100_000))
+    # Популярные ингредиенты встречаются чаще, как в настоящем каталоге
+    rng = random.Random(1)
+    population = range(1, INGREDIENTS + 1)
+    weights = [1 / pk for pk in population]
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=recipe, ingredient_id=pk, amount=1)
+        for recipe in recipes
+        for pk in set(rng.choices(
+            population, weights, k=INGREDIENTS_PER_RECIPE
+        ))
+    )
+    on_hand = list(range(1, ON_HAND + 1))
+    report(
+        f'{len(recipes)} рецептов',
+        rows=IngredientRecipe.objects.count(), on_hand=ON_HAND
+    )
+    built, _ = measure(
+        lambda: coverage_index.invalidate() or coverage_index.state,
+        repeat=1
+    )
+    computed, found = measure(lambda: cookable_recipes(on_hand, LIMIT))
+    assert len(found) == LIMIT
+    ratios = [recipe.covered / recipe.total for recipe in found]
+    assert ratios == sorted(ratios, reverse=True)
+    api, response = measure(lambda: client.get(
+        '/api/recipes/cookable/', {'ingredients': on_hand, 'limit': LIMIT}
+    ))
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.data] == [
+        recipe.pk for recipe in found
+    ]
+    report(
+        'cookable', build_ms=built, query_ms=computed, api_ms=api,
+        budget_ms=BUDGET_MS
+    )
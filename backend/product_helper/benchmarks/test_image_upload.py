@@ -0,0 +1,50 @@
+import base64
+import io
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from benchmarks import measure, peak_memory, report
+from recipes.fields import StreamingBase64ImageField
+
+IMAGE_BYTES = 10 * 1024 * 1024
+
+
+@pytest.fixture(scope='module')
+def image():
+    """PNG из шума около 10 МБ: шум почти не сжимается."""
+    side = int((IMAGE_BYTES / 3) ** 0.5)
+    buffer = io.BytesIO()
+    Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(
+        buffer, 'PNG', compress_level=0
+    )
+    return buffer.getvalue()
+
+
+def test_image_upload(image, settings):
+    settings.RECIPE_IMAGE_MAX_BYTES = 2 * len(image)
+    encoded = 'data:image/png;base64,' + base64.b64encode(image).decode()
+    cases = {
+        'base64 Base64ImageField': lambda: Base64ImageField(
+        ).to_internal_value(encoded),
+        'base64 StreamingBase64ImageField': lambda: (
+            StreamingBase64ImageField().to_internal_value(encoded)
+        ),
+        'multipart StreamingBase64ImageField': lambda: (
+            StreamingBase64ImageField().to_internal_value(
+                SimpleUploadedFile('image.png', image)
+            )
+        ),
+    }
+    report(
+        'Изображение', image_mb=len(image) / 2 ** 20,
+        base64_mb=len(encoded) / 2 ** 20
+    )
+    for name, decode in cases.items():
+        peak, file = peak_memory(decode)
+        assert file.size == len(image)
+        elapsed, _ = measure(decode, repeat=3)
+        report(name, ms=elapsed, peak_mb=peak / 2 ** 20)
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks import measure, report, sized
+from recipes.autocomplete import autocomplete, ingredient_index
+from recipes.models import Ingredient
+
+WORDS = ('молоко', 'мука', 'морковь', 'сахар', 'соль', 'перец', 'томат',
+         'сыр', 'масло', 'яйцо')
+QUERIES = ('мо', 'мол', 'олок', 'сыр 1', 'ковь 99')
+
+
+@pytest.mark.django_db
+def test_autocomplete(client):
+    count = sized(100_000)
+    Ingredient.objects.bulk_create((
+        Ingredient(
+            pk=i + 1, name=f'{WORDS[i % len(WORDS)]} {i}',
+            measurement_unit='G'
+        )
+        for i in range(count)
+    ))
+    elapsed, _ = measure(lambda: ingredient_index.invalidate() or len(
+        ingredient_index.entries
+    ), repeat=1)
+    report(f'Индекс {count} ингредиентов', build_ms=elapsed)
+    for value in QUERIES:
+        indexed, ids = measure(lambda: list(autocomplete(
+            Ingredient.objects.all(), value
+        ).values_list('pk', flat=True)))
+        scanned, _ = measure(lambda: list(Ingredient.objects.filter(
+            name__icontains=value
+        ).values_list('pk', flat=True)))
+        api, response = measure(
+            lambda: client.get('/api/ingredients/', {'name': value})
+        )
+        assert response.status_code == 200
+        assert len(response.data) == len(ids)
+        report(
+            f'{value!r}', autocomplete_ms=indexed, icontains_ms=scanned,
+            api_ms=api, results=len(ids)
+        )
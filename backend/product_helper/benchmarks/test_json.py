@@ -0,0 +1,65 @@
+from io import BytesIO
+from itertools import cycle, islice
+
+import pytest
+from django.core.management import call_command
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from benchmarks import measure, report
+
+ITERATIONS = 20
+
+
+@pytest.fixture
+def payloads(client):
+    """Ответы API на данных data/fixtures.json: справочник ингредиентов,
+    страница списка рецептов и страница курсора из 100 рецептов."""
+    call_command('loaddata', 'data/fixtures.json', verbosity=0)
+    recipes = client.get('/api/recipes/').data
+    cursor_page = [
+        dict(recipe, id=pk) for pk, recipe in enumerate(
+            islice(cycle(recipes['results']), 100), start=1
+        )
+    ]
+    return {
+        'ingredients': client.get('/api/ingredients/').json(),
+        'recipes': recipes,
+        'recipes cursor 100': {'next': None, 'previous': None,
+                               'results': cursor_page},
+    }
+
+
+def repeat(func):
+    return lambda: [func() for _ in range(ITERATIONS)][-1]
+
+
+@pytest.mark.django_db
+def test_json(payloads):
+    for name, data in payloads.items():
+        rendered, content = measure(repeat(
+            lambda: JSONRenderer().render(data)
+        ))
+        fast_rendered, fast_content = measure(repeat(
+            lambda: FastJSONRenderer().render(data)
+        ))
+        assert fast_content == content
+        # Кириллица не экранируется
+        assert b'\\u04' not in content
+        parsed, value = measure(repeat(
+            lambda: JSONParser().parse(BytesIO(content))
+        ))
+        fast_parsed, fast_value = measure(repeat(
+            lambda: FastJSONParser().parse(BytesIO(content))
+        ))
+        assert fast_value == value
+        megabytes = len(content) * ITERATIONS / 2 ** 20
+        report(
+            f'{name} ({len(content) / 1024:.0f} КБ)',
+            render_mb_s=megabytes / rendered * 1000,
+            fast_render_mb_s=megabytes / fast_rendered * 1000,
+            parse_mb_s=megabytes / parsed * 1000,
+            fast_parse_mb_s=megabytes / fast_parsed * 1000
+        )
@@ -0,0 +1,32 @@
+from base64 import b64encode
+from urllib.parse import urlencode
+
+import pytest
+
+from benchmarks import bulk_recipes, measure, report, sized
+
+PAGE_SIZE = 6
+
+
+def cursor(position):
+    """Курсор DRF CursorPagination, указывающий на id position."""
+    return b64encode(urlencode({'p': position}).encode()).decode()
+
+
+@pytest.mark.django_db
+def test_deep_pages(client, author):
+    pages = sized(10_000)
+    bulk_recipes(author, pages * PAGE_SIZE)
+    for page in (1, pages):
+        numbered, response = measure(
+            lambda: client.get('/api/recipes/', {'page': page})
+        )
+        first = response.data['results'][0]['id']
+        # Курсор страницы page: id рецептов идут по убыванию
+        position = (pages - page + 1) * PAGE_SIZE + 1
+        keyset, response = measure(lambda: client.get('/api/recipes/', {
+            'pagination': 'cursor', 'limit': PAGE_SIZE,
+            'cursor': cursor(position)
+        }))
+        assert response.data['results'][0]['id'] == first == position - 1
+        report(f'Страница {page}', page_ms=numbered, cursor_ms=keyset)
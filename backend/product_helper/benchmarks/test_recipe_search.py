@@ -0,0 +1,62 @@
+import pytest
+from django.db.models import Q
+
+from benchmarks import measure, report, sized
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.search import recipe_index, search
+
+DISHES = ('суп', 'салат', 'пирог', 'каша', 'рагу', 'омлет', 'плов')
+INGREDIENTS = ('картофель', 'морковь', 'лук', 'курица', 'рис', 'яйцо',
+               'сыр', 'томат', 'капуста', 'грибы')
+QUERIES = ('суп', 'пирог грибы', 'омлет сыр томат', 'нет такого')
+INGREDIENTS_PER_RECIPE = 3
+PAGE_SIZE = 6
+
+
+@pytest.mark.django_db
+def test_search(client, author):
+    ingredients = [
+        Ingredient.objects.create(name=name, measurement_unit='G')
+        for name in INGREDIENTS
+    ]
+    count = sized(100_000)
+    Recipe.objects.bulk_create(
+        Recipe(
+            pk=pk, author=author, cooking_time=10,
+            name=f'{DISHES[pk % len(DISHES)]} {pk}',
+            text=f'Рецепт номер {pk}, готовить {pk % 60} минут',
+            image='recipes/images/recipe.png'
+        )
+        for pk in range(1, count + 1)
+    )
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            recipe_id=pk, amount=1,
+            ingredient=ingredients[(pk + i) % len(ingredients)]
+        )
+        for pk in range(1, count + 1)
+        for i in range(INGREDIENTS_PER_RECIPE)
+    )
+    built, _ = measure(lambda: recipe_index.invalidate() or len(
+        recipe_index.postings
+    ), repeat=1)
+    report(f'Индекс {count} рецептов', build_ms=built)
+    for value in QUERIES:
+        searched, ids = measure(lambda: list(search(
+            Recipe.objects.all(), value
+        ).values_list('pk', flat=True)[:PAGE_SIZE]))
+        # Поиск подстроки без индекса, как было до ?search=
+        matches = Q(name__icontains=value) | Q(text__icontains=value)
+        matches |= Q(ingredients__name__icontains=value)
+        scanned, _ = measure(lambda: list(Recipe.objects.filter(
+            matches
+        ).distinct().values_list('pk', flat=True)[:PAGE_SIZE]))
+        api, response = measure(
+            lambda: client.get('/api/recipes/', {'search': value})
+        )
+        assert response.status_code == 200
+        assert [recipe['id'] for recipe in response.data['results']] == ids
+        report(
+            repr(value), search_ms=searched, icontains_ms=scanned,
+            api_ms=api, found=response.data['count']
+        )
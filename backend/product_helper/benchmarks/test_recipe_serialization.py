@@ -0,0 +1,41 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from benchmarks import measure, report
+from recipes.rows import cached_relations, recipe_dicts, recipe_rows
+from recipes.views import RecipeViewSet
+
+
+def list_view():
+    view = RecipeViewSet(action='list', format_kwarg=None)
+    view.request = Request(APIRequestFactory().get('/api/recipes/'))
+    return view
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (6, 60, 600))
+def test_serialization(count, author, make_recipes):
+    make_recipes(author, count)
+    view = list_view()
+    queryset = view.get_queryset()
+    objects = list(queryset)
+    rows = list(recipe_rows(queryset))
+    # Ингредиенты и тэги строк в кэше, как у повторных запросов списка
+    cached_relations(rows)
+
+    def serializer():
+        return view.get_serializer(objects, many=True).data
+
+    def dicts():
+        return recipe_dicts(rows, view.request, 'image_thumbnail')
+
+    slow, slow_data = measure(serializer)
+    fast, fast_data = measure(dicts)
+    renderer = JSONRenderer()
+    assert renderer.render(fast_data) == renderer.render(slow_data)
+    report(
+        f'{count} рецептов', serializer_ms=slow, dicts_ms=fast,
+        speedup=slow / fast
+    )
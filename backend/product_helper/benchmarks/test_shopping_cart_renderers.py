@@ -0,0 +1,28 @@
+import pytest
+
+from benchmarks import measure, peak_memory, report
+from recipes.renderers import SHOPPING_CART_RENDERERS
+
+
+def lines(count):
+    return [
+        {'name': f'Ингредиент {i}', 'amount': i * 10, 'unit': 'г'}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('renderer_class', SHOPPING_CART_RENDERERS,
+                         ids=lambda renderer: renderer.format)
+@pytest.mark.parametrize('count', (10, 100, 1000))
+def test_render(renderer_class, count):
+    renderer = renderer_class()
+    data = lines(count)
+    # Первый вызов загружает шрифт PDF, он не входит в замер
+    renderer.render(data)
+    elapsed, content = measure(lambda: renderer.render(data))
+    peak, _ = peak_memory(lambda: renderer.render(data))
+    assert content
+    report(
+        f'{renderer.format} {count} строк', ms=elapsed,
+        kb=len(content) / 1024, peak_kb=peak / 1024
+    )
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+import pytest
+
+from benchmarks import bulk_recipes, measure, report
+from recipes.models import (MEASURE_CHOICES, Ingredient, IngredientRecipe,
+                            ShoppingCart)
+from recipes.shopping import (UNIT_CONVERSIONS, shopping_list,
+                              shopping_list_lines)
+
+INGREDIENTS = 200
+INGREDIENTS_PER_RECIPE = 10
+
+
+def python_shopping_list(user):
+    """Тот же список циклом по строкам IngredientRecipe в Python, без
+    лишних запросов: сравнивается только стоимость агрегации."""
+    servings = dict(ShoppingCart.objects.filter(user=user).values_list(
+        'recipe_id', 'servings'
+    ))
+    totals = defaultdict(int)
+    for row in IngredientRecipe.objects.filter(
+        recipe_id__in=servings
+    ).select_related('ingredient'):
+        unit, factor = UNIT_CONVERSIONS.get(
+            row.ingredient.measurement_unit,
+            (row.ingredient.measurement_unit, 1)
+        )
+        totals[row.ingredient.name, unit] += (
+            row.amount * factor * servings[row.recipe_id]
+        )
+    return totals
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('cart_size', (50, 500))
+def test_shopping_list(cart_size, user, user_client, author):
+    units = [unit for unit, _ in MEASURE_CHOICES]
+    Ingredient.objects.bulk_create(
+        Ingredient(pk=pk, name=f'Ингредиент {pk}',
+                   measurement_unit=units[pk % len(units)])
+        for pk in range(1, INGREDIENTS + 1)
+    )
+    recipes = bulk_recipes(author, cart_size)
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
+            recipe=recipe, amount=recipe.pk % 7 + 1,
+            ingredient_id=(recipe.pk * INGREDIENTS_PER_RECIPE + i)
+            % INGREDIENTS + 1
+        )
+        for recipe in recipes for i in range(INGREDIENTS_PER_RECIPE)
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe, servings=recipe.pk % 4 + 1)
+        for recipe in recipes
+    )
+    aggregated, lines = measure(
+        lambda: list(shopping_list_lines(shopping_list(user)))
+    )
+    looped, totals = measure(lambda: python_shopping_list(user))
+    assert {
+        (line['name'], line['unit']): line['total']
+        for line in shopping_list(user)
+    } == totals
+    api, response = measure(lambda: b''.join(user_client.get(
+        '/api/recipes/download_shopping_cart/', {'format': 'txt'}
+    ).streaming_content))
+    assert response.count(b'\n') == len(lines) + 1
+    report(
+        f'{cart_size} рецептов в корзине', sql_ms=aggregated,
+        python_ms=looped, download_ms=api, lines=len(lines)
+    )
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks import bulk_recipes, measure, report, sized
+from recipes.filters import RecipeFilter
+from recipes.models import Recipe, Tag, TagRecipe
+
+TAGS = 20
+TAGS_PER_RECIPE = 10
+PAGE_SIZE = 6
+
+
+@pytest.mark.django_db
+def test_tag_filter(client, author):
+    tags = [
+        Tag.objects.create(name=f'Тэг {i}', color=f'#0000{i:02}',
+                           slug=f'tag-{i}')
+        for i in range(TAGS)
+    ]
+    recipes = bulk_recipes(author, sized(1_000_000) // TAGS_PER_RECIPE)
+    TagRecipe.objects.bulk_create(
+        TagRecipe(recipe=recipe, tag=tags[(recipe.pk + i) % TAGS])
+        for recipe in recipes for i in range(TAGS_PER_RECIPE)
+    )
+    slugs = [tag.slug for tag in tags[:3]]
+    report(f'{len(recipes)} рецептов', tag_rows=TagRecipe.objects.count())
+
+    def subquery():
+        return list(RecipeFilter(
+            {'tags': slugs}, Recipe.objects.all()
+        ).qs.values_list('pk', flat=True)[:PAGE_SIZE])
+
+    def join():
+        # Прежний фильтр по tags__slug: JOIN и DISTINCT
+        return list(Recipe.objects.filter(
+            tags__slug__in=slugs
+        ).distinct().values_list('pk', flat=True)[:PAGE_SIZE])
+
+    filtered, ids = measure(subquery)
+    joined, join_ids = measure(join)
+    assert len(set(ids)) == len(ids) == PAGE_SIZE
+    assert ids == join_ids
+    api, response = measure(
+        lambda: client.get('/api/recipes/', {'tags': slugs})
+    )
+    assert response.status_code == 200
+    report(
+        f'tags={",".join(slugs)}', subquery_ms=filtered, join_ms=joined,
+        api_ms=api
+    )
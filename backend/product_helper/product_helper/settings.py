@@ -93,6 +93,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    # orjson, если установлен, с тем же выводом, что у стандартных
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.LimitedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'api.parsers.MultiPartJSONParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6
 }
@@ -122,3 +132,43 @@ MEDIA_URL = '/backend_media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'backend_media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+INGREDIENT_AUTOCOMPLETE_LIMIT = 20
+COOKABLE_RECIPES_LIMIT = 10
+# Как часто (в секундах) индекс покрытия рецептов проверяет версию
+# рецептов в базе, см. recipes/cookable.py
+COOKABLE_INDEX_MAX_AGE = 60
+# Список и страница рецепта собираются из .values() без полей DRF
+# (recipes/rows.py), False - через RecipeReadSerializer
+RECIPE_FAST_SERIALIZATION = True
+# Алиас из CACHES для ингредиентов и тэгов рецептов, см. recipes/rows.py
+RECIPE_CACHE_ALIAS = os.getenv('RECIPE_CACHE_ALIAS', 'default')
+RECIPE_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Варианты изображений рецептов строятся в пуле потоков после сохранения
+# (0 - синхронно), см. recipes/images.py
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_THUMBNAIL_SIZE = (480, 320)
+RECIPE_IMAGE_MAX_SIZE = (1280, 1280)
+RECIPE_IMAGE_WEBP_QUALITY = 80
+# Предел размера загружаемого изображения и тела запроса
+# (base64 в JSON длиннее файла на треть)
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+API_MAX_BODY_BYTES = RECIPE_IMAGE_MAX_BYTES * 4 // 3 + 1024 * 1024
+
+# Окно (в днях) для сортировки рецептов по популярности, пересчет -
+# manage.py refresh_popularity
+POPULARITY_WINDOW_DAYS = 7
+
+# Алиас из CACHES для JSON справочников (тэги, ингредиенты), общий для
+# всех воркеров. None - только память процесса. Версии справочников
+# хранятся в базе (CatalogueVersion).
+CATALOGUE_CACHE_ALIAS = os.getenv('CATALOGUE_CACHE_ALIAS') or None
+CATALOGUE_CACHE_LRU_SIZE = 8
+
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
@@ -1,10 +1,40 @@
 from django.contrib import admin
 
+from .counters import refresh_recipe_counters
+from .images import reset_variants, schedule_variants
 from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .search import update_search_documents
 
 EMPTY_VALUE = '-пусто-'
 
 
+class RecountOnDeleteMixin:
+    """Пересчитывает счетчики объектов counted_field удаленных связей:
+    у моделей связей нет обработчиков post_delete (см. signals.py)."""
+    counted_field = None
+
+    def refresh_counters(self, ids):
+        raise NotImplementedError
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.refresh_counters([getattr(obj, f'{self.counted_field}_id')])
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list(
+            f'{self.counted_field}_id', flat=True
+        ))
+        super().delete_queryset(request, queryset)
+        self.refresh_counters(ids)
+
+
+class RecipeCountersAdminMixin(RecountOnDeleteMixin):
+    counted_field = 'recipe'
+
+    def refresh_counters(self, ids):
+        refresh_recipe_counters(Recipe.objects.filter(pk__in=ids))
+
+
 class RecipeIngredientLine(admin.TabularInline):
     model = Recipe.ingredients.through
     extra = 1
@@ -33,12 +63,26 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('author', 'name', 'text',
-                    'cooking_time')
-    search_fields = ('name', 'description', )
+                    'cooking_time', 'favorites_count', 'carts_count')
+    readonly_fields = ('favorites_count', 'carts_count')
+    search_fields = ('name', 'text', )
     inlines = (RecipeIngredientLine, RecipeTagLine)
     list_filter = ('author', 'tags')
     empty_value_display = EMPTY_VALUE
 
+    def save_model(self, request, obj, form, change):
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            reset_variants(obj)
+        super().save_model(request, obj, form, change)
+        if image_changed:
+            schedule_variants(obj)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Ингредиенты из inline сохраняются после рецепта
+        update_search_documents(Recipe.objects.filter(pk=form.instance.pk))
+
     def show_ingredients(self, obj):
         return '\n'.join([ingr.name for ingr in obj.ingredients.all()])
 
@@ -47,7 +91,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(RecipeCountersAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'recipe')
     search_fields = ('user', 'recipe')
     list_filter = ('user', 'recipe')
@@ -55,8 +99,8 @@ class FavoriteAdmin(admin.ModelAdmin):
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe')
+class ShoppingCartAdmin(RecipeCountersAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'recipe', 'servings')
     search_fields = ('user', 'recipe')
     list_filter = ('user', 'recipe')
     empty_value_display = EMPTY_VALUE
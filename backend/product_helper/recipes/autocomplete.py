@@ -0,0 +1,96 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
+
+from .models import Ingredient
+
+# Предел списка id для in_order: CASE растет с каждым id, индексы в
+# памяти процесса отдают не больше стольких лучших совпадений
+IN_ORDER_MAX_IDS = 1000
+# Триграммный индекс бесполезен для запросов короче трех символов,
+# для них выполняется только поиск по префиксу (btree pattern_ops).
+TRIGRAM_MIN_LENGTH = 3
+
+
+class IngredientIndex:
+    """Отсортированный список названий ингредиентов в памяти процесса.
+
+    Используется вместо индексов PostgreSQL на других СУБД (тесты,
+    локальный запуск). Сбрасывается сигналами при изменении Ingredient.
+    """
+
+    def __init__(self):
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._entries = None
+
+    @property
+    def entries(self):
+        entries = self._entries
+        if entries is None:
+            with self._lock:
+                entries = sorted(
+                    (name.lower(), pk) for pk, name in
+                    Ingredient.objects.values_list('pk', 'name')
+                )
+                self._entries = entries
+        return entries
+
+    def search(self, value, limit):
+        value = value.lower()
+        entries = self.entries
+        ids = []
+        for name, pk in entries[bisect_left(entries, (value,)):]:
+            if len(ids) >= limit or not name.startswith(value):
+                break
+            ids.append(pk)
+        if len(ids) < limit and len(value) >= TRIGRAM_MIN_LENGTH:
+            for name, pk in entries:
+                if value in name and not name.startswith(value):
+                    ids.append(pk)
+                    if len(ids) >= limit:
+                        break
+        return ids
+
+
+ingredient_index = IngredientIndex()
+
+
+def uses_postgresql(queryset):
+    """Индексы PostgreSQL (триграммы, tsvector) есть у базы queryset,
+    иначе поиск идет по индексам в памяти процесса."""
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def in_order(queryset, ids):
+    """Объекты queryset с id из ids в порядке ids, не больше
+    IN_ORDER_MAX_IDS."""
+    ids = ids[:IN_ORDER_MAX_IDS]
+    order = Case(
+        *(When(pk=pk, then=Value(position))
+          for position, pk in enumerate(ids)),
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+def autocomplete(queryset, value, limit=None):
+    """Ингредиенты, начинающиеся с value, затем содержащие value."""
+    limit = limit or settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+    if not uses_postgresql(queryset):
+        return in_order(queryset, ingredient_index.search(value, limit))
+    if len(value) < TRIGRAM_MIN_LENGTH:
+        return queryset.filter(name__istartswith=value).order_by(
+            'name')[:limit]
+    return queryset.filter(name__icontains=value).annotate(
+        rank=Case(
+            When(name__istartswith=value, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+    ).order_by('rank', 'name')[:limit]
@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+from api.renderers import FastJSONRenderer
+from .conditional import make_etag, not_modified, set_validators
+from .models import CatalogueVersion, Ingredient, Tag
+from .serializers import IngredientSerializer, TagSerializer
+
+CatalogueEntry = namedtuple(
+    'CatalogueEntry', 'data content etag last_modified'
+)
+
+
+def stored_version(name):
+    """(версия, время изменения) строки CatalogueVersion name одним
+    запросом, (0, None) для данных, которые еще не менялись."""
+    return CatalogueVersion.objects.filter(name=name).values_list(
+        'version', 'changed_at'
+    ).first() or (0, None)
+
+
+def bump_version(name):
+    versions = CatalogueVersion.objects.filter(name=name)
+    if not versions.update(
+        version=F('version') + 1, changed_at=timezone.now()
+    ):
+        CatalogueVersion.objects.get_or_create(
+            name=name, defaults={'version': 1}
+        )
+
+
+class CatalogueCache:
+    """Готовый JSON списка справочника (тэги, ингредиенты).
+
+    Версия - строка CatalogueVersion в базе, ее увеличивают сигналы
+    изменения справочника в той же транзакции, поэтому все процессы,
+    loaddata и перезапуски видят одну версию. Полезная нагрузка
+    хранится в LRU процесса по ключу версии и, если задан
+    CATALOGUE_CACHE_ALIAS, в общем кэше Django.
+    """
+
+    def __init__(self, name, queryset, serializer_class):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = settings.CATALOGUE_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def version(self):
+        return stored_version(self.name)
+
+    def invalidate(self):
+        bump_version(self.name)
+
+    def reset(self):
+        """Забывает записи процесса, общий кэш не трогает."""
+        with self._lock:
+            self._entries.clear()
+
+    def entry(self):
+        version, changed_at = self.version()
+        # Время изменения отличает версии справочника пересозданной базы
+        stamp = (version, changed_at and changed_at.timestamp())
+        with self._lock:
+            entry = self._entries.get(stamp)
+            if entry is not None:
+                self._entries.move_to_end(stamp)
+                return entry
+        shared = self.shared
+        key = 'catalogue:{}:{}:{}'.format(self.name, *stamp)
+        entry = shared.get(key) if shared is not None else None
+        if entry is None:
+            entry = self.build(version, changed_at)
+            if shared is not None:
+                shared.set(key, entry, None)
+        with self._lock:
+            self._entries[stamp] = entry
+            while len(self._entries) > settings.CATALOGUE_CACHE_LRU_SIZE:
+                self._entries.popitem(last=False)
+        return entry
+
+    def build(self, version, changed_at):
+        data = [
+            dict(item) for item in
+            self.serializer_class(self.queryset.all(), many=True).data
+        ]
+        content = FastJSONRenderer().render(data)
+        return CatalogueEntry(
+            data=data,
+            content=content,
+            etag=make_etag(self.name, version, changed_at, len(content)),
+            last_modified=(
+                int(changed_at.timestamp()) if changed_at else None
+            )
+        )
+
+
+class CatalogueCacheMixin:
+    """list() справочника из CatalogueCache с поддержкой 304: один
+    запрос версии вместо выборки и сериализации справочника.
+
+    Запросы с параметрами (фильтры, format) обрабатываются как обычно.
+    """
+    catalogue = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        entry = self.catalogue.entry()
+        response = not_modified(request, entry.etag, entry.last_modified)
+        if response is None:
+            response = HttpResponse(
+                entry.content, content_type='application/json'
+            )
+            set_validators(response, entry.etag, entry.last_modified)
+        return response
+
+
+tag_catalogue = CatalogueCache('tags', Tag.objects.all(), TagSerializer)
+ingredient_catalogue = CatalogueCache(
+    'ingredients', Ingredient.objects.all(), IngredientSerializer
+)
+
+
+def tag_ids_by_slug():
+    return {tag['slug']: tag['id'] for tag in tag_catalogue.entry().data}
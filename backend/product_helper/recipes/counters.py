@@ -0,0 +1,110 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Subscribtion, UserStats
+from .models import Favorite, Recipe, ShoppingCart
+
+User = get_user_model()
+
+
+def change_counter(queryset, field, delta):
+    """F()-обновление счетчика, не опускающее его ниже нуля."""
+    return queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+class DeletingUsers(threading.local):
+    """id пользователей, удаляемых в текущем потоке.
+
+    Их счетчики удаляются тем же каскадом, поэтому обработчики удаления
+    рецептов их не обновляют.
+    """
+
+    def __init__(self):
+        self.ids = set()
+
+
+deleting_users = DeletingUsers()
+
+
+def change_user_counter(user_id, field, delta):
+    updated = change_counter(
+        UserStats.objects.filter(user_id=user_id), field, delta
+    )
+    # При удалении пользователя каскадом его счетчики могут быть уже
+    # удалены, пересоздавать их нельзя
+    if not updated and delta > 0:
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults={field: delta}
+        )
+
+
+def release_user_counters(user):
+    """Уменьшает счетчики рецептов в избранном и списках покупок user
+    и подписчиков его авторов тремя UPDATE перед удалением user.
+
+    У Favorite, ShoppingCart и Subscribtion нет обработчиков
+    post_delete, чтобы каскады удаляли их одним DELETE без выборки
+    строк.
+    """
+    change_counter(Recipe.objects.filter(
+        pk__in=Favorite.objects.filter(user=user).values('recipe_id')
+    ), 'favorites_count', -1)
+    change_counter(Recipe.objects.filter(
+        pk__in=ShoppingCart.objects.filter(user=user).values('recipe_id')
+    ), 'carts_count', -1)
+    change_counter(UserStats.objects.filter(
+        user_id__in=Subscribtion.objects.filter(user=user).values(
+            'author_id'
+        )
+    ), 'followers_count', -1)
+
+
+def count_of(queryset, field):
+    """Коррелированный COUNT(*) строк queryset с field = OuterRef('pk')."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def author_recipes_count():
+    """recipes_count автора из UserStats. Пользователю без строки
+    счетчиков (loaddata до rebuild_counters) рецепты считает подзапрос,
+    COALESCE выполняет его только для таких строк."""
+    return Coalesce(
+        F('stats__recipes_count'), count_of(Recipe.objects.all(), 'author')
+    )
+
+
+def refresh_recipe_counters(recipes):
+    """Пересчитывает счетчики рецептов queryset recipes с нуля."""
+    return recipes.update(
+        favorites_count=count_of(Favorite.objects.all(), 'recipe'),
+        carts_count=count_of(ShoppingCart.objects.all(), 'recipe')
+    )
+
+
+def refresh_user_counters(users):
+    """Пересчитывает счетчики пользователей queryset users с нуля."""
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.values_list('pk', flat=True)),
+        ignore_conflicts=True
+    )
+    return UserStats.objects.filter(user__in=users).update(
+        recipes_count=count_of(Recipe.objects.all(), 'author'),
+        followers_count=count_of(Subscribtion.objects.all(), 'author')
+    )
+
+
+@transaction.atomic
+def rebuild_counters():
+    return (
+        refresh_recipe_counters(Recipe.objects.all()),
+        refresh_user_counters(User.objects.all())
+    )
@@ -0,0 +1,149 @@
+import binascii
+import re
+import uuid
+from collections import Counter
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+from .validators import (DUPLICATE_IDS_MESSAGE, IMAGE_TOO_LARGE_MESSAGE,
+                         MISSING_IDS_MESSAGE)
+
+BASE64_HEADER = ';base64,'
+# Кратно 4, чтобы куски base64 декодировались независимо
+BASE64_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s')
+
+
+def join_ids(ids):
+    return ', '.join(str(pk) for pk in ids)
+
+
+def check_duplicate_ids(pks):
+    duplicates = [pk for pk, count in Counter(pks).items() if count > 1]
+    if duplicates:
+        raise serializers.ValidationError(
+            DUPLICATE_IDS_MESSAGE.format(ids=join_ids(duplicates))
+        )
+
+
+def resolve_ids(queryset, pks):
+    """Объекты по списку id одним запросом, в порядке списка.
+
+    Все отсутствующие id попадают в одну ошибку валидации.
+    """
+    objects = queryset.in_bulk(pks)
+    missing = [pk for pk in pks if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            MISSING_IDS_MESSAGE.format(ids=join_ids(missing))
+        )
+    return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.ListField):
+    """Замена PrimaryKeyRelatedField(many=True) с одним запросом id__in
+    вместо отдельного SELECT на каждый переданный id."""
+    child = serializers.IntegerField(min_value=1)
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pks = super().to_internal_value(data)
+        check_duplicate_ids(pks)
+        return resolve_ids(self.queryset.all(), pks)
+
+    def to_representation(self, value):
+        return [obj.pk for obj in value.all()]
+
+
+class RecipeImageField(Base64ImageField):
+    """Base64ImageField, который при чтении отдает готовый вариант
+    изображения рецепта: list_variant в списках (action list), variant
+    в остальных случаях. Пока вариант не построен - оригинал."""
+
+    def __init__(self, variant=None, list_variant=None, **kwargs):
+        self.variant = variant
+        self.list_variant = list_variant or variant
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        view = self.context.get('view')
+        if getattr(view, 'action', None) == 'list':
+            variant = self.list_variant
+        else:
+            variant = self.variant
+        image = getattr(instance, variant, None) if variant else None
+        return image or super().get_attribute(instance)
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """Изображение строкой base64 или загруженным файлом (multipart).
+
+    base64 декодируется кусками в SpooledTemporaryFile, без полной
+    декодированной копии в памяти. Размер больше RECIPE_IMAGE_MAX_BYTES
+    отклоняется по длине строки до декодирования. Pillow только
+    проверяет файл, не загружая изображение целиком.
+    """
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+        elif isinstance(data, str):
+            data = self.decode(data)
+        else:
+            self.fail('invalid')
+        data = serializers.FileField.to_internal_value(self, data)
+        data.name = f'{uuid.uuid4()}.{self.verify(data)}'
+        return data
+
+    def check_size(self, size):
+        limit = settings.RECIPE_IMAGE_MAX_BYTES
+        if size > limit:
+            raise serializers.ValidationError(
+                IMAGE_TOO_LARGE_MESSAGE.format(limit=limit)
+            )
+
+    def decode(self, data):
+        start = data.find(BASE64_HEADER)
+        start = 0 if start == -1 else start + len(BASE64_HEADER)
+        self.check_size((len(data) - start) // 4 * 3 - 2)
+        if WHITESPACE.search(data, start):
+            data, start = ''.join(data[start:].split()), 0
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        try:
+            for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+                file.write(binascii.a2b_base64(
+                    data[offset:offset + BASE64_CHUNK_SIZE]
+                ))
+        except binascii.Error:
+            file.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+        size = file.tell()
+        file.seek(0)
+        return UploadedFile(file, name='image', size=size)
+
+    def verify(self, file):
+        """Проверяет изображение и возвращает расширение файла."""
+        try:
+            image = Image.open(file)
+            image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(0)
+        extension = (image.format or '').lower()
+        extension = 'jpg' if extension == 'jpeg' else extension
+        if extension not in self.ALLOWED_TYPES:
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        return extension
@@ -2,18 +2,40 @@ import urllib
 
 from django_filters import rest_framework as filters
 
-from .models import Ingredient, Recipe, User
+from .autocomplete import autocomplete
+from .cache import tag_ids_by_slug
+from .models import Ingredient, Recipe, TagRecipe, User
+from .search import search
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids_by_slug()]
 
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='tags_filter'
     )
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all()
     )
     is_favorited = filters.BooleanFilter(method='favorite_filter')
     is_in_shopping_cart = filters.BooleanFilter(method='shopping_card_filter')
+    search = filters.CharFilter(method='search_filter')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'По популярности'),),
+        method='ordering_filter'
+    )
+
+    def tags_filter(self, queryset, name, value):
+        # Подзапрос вместо JOIN: рецепт с несколькими подходящими
+        # тэгами не дублируется, DISTINCT не нужен. Тэг, удаленный после
+        # проверки value по tag_choices, пропускается
+        ids = tag_ids_by_slug()
+        return queryset.filter(id__in=TagRecipe.objects.filter(
+            tag_id__in=[ids[slug] for slug in value if slug in ids]
+        ).values('recipe_id'))
 
     def favorite_filter(self, queryset, name, value):
         if value == 1:
@@ -25,6 +47,18 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(users_carts__user=self.request.user)
         return queryset
 
+    def search_filter(self, queryset, name, value):
+        return search(queryset, value)
+
+    def ordering_filter(self, queryset, name, value):
+        if value == 'popular':
+            # Строка популярности есть у каждого рецепта, поэтому
+            # INNER JOIN и сортировка по индексу recipe_popularity_score
+            return queryset.filter(popularity__isnull=False).order_by(
+                '-popularity__score', '-id'
+            )
+        return queryset
+
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
@@ -35,7 +69,7 @@ class IngredientFilter(filters.FilterSet):
 
     def name_filter(self, queryset, name, value):
         decoded_value = urllib.parse.unquote_plus(value)
-        return queryset.filter(name__icontains=decoded_value)
+        return autocomplete(queryset, decoded_value)
 
     class Meta:
         model = Ingredient
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'images/recipes/thumbnails/'
+WEBP_DIR = 'images/recipes/webp/'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-images'
+            )
+    return _executor
+
+
+def variant_name(directory, name):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'{directory}{stem}.webp'
+
+
+def save_webp(image, name):
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=settings.RECIPE_IMAGE_WEBP_QUALITY)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(pk, name):
+    """Превью фиксированного размера и WebP не больше
+    RECIPE_IMAGE_MAX_SIZE для изображения name рецепта pk."""
+    try:
+        with default_storage.open(name) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            thumbnail = save_webp(
+                ImageOps.fit(image, settings.RECIPE_THUMBNAIL_SIZE,
+                             Image.LANCZOS),
+                variant_name(THUMBNAIL_DIR, name)
+            )
+            image.thumbnail(settings.RECIPE_IMAGE_MAX_SIZE, Image.LANCZOS)
+            webp = save_webp(image, variant_name(WEBP_DIR, name))
+        # Изображение могли заменить, пока строились варианты
+        Recipe.objects.filter(pk=pk, image=name).update(
+            image_thumbnail=thumbnail,
+            image_webp=webp,
+            updated_at=timezone.now()
+        )
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+
+
+def build_variants_in_worker(pk, name):
+    try:
+        build_variants(pk, name)
+    finally:
+        # Соединения с БД в потоках пула открываются отдельно
+        connections.close_all()
+
+
+def reset_variants(recipe):
+    """Сбрасывает варианты старого изображения рецепта перед сохранением
+    нового: до постройки новых RecipeImageField отдает оригинал, а
+    build_image_variants находит рецепт по пустому превью."""
+    recipe.image_thumbnail = ''
+    recipe.image_webp = ''
+
+
+def schedule_variants(recipe):
+    """Строит варианты изображения рецепта после фиксации транзакции,
+    в пуле потоков или, при RECIPE_IMAGE_WORKERS = 0, сразу."""
+    pk, name = recipe.pk, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            executor().submit(build_variants_in_worker, pk, name)
+        else:
+            build_variants(pk, name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Строит превью и WebP-варианты изображений рецептов, '
+            'у которых их еще нет')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить варианты для всех рецептов'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_thumbnail='')
+        count = 0
+        for pk, name in recipes.values_list('pk', 'image').iterator():
+            build_variants(pk, name)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {count}'
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+
+from recipes.models import IngredientRecipe, TagRecipe
+
+
+def dedupe(model, fields, sum_field=None):
+    """Оставляет по одной строке model на каждое сочетание fields.
+
+    Остается строка с меньшим id. sum_field получает сумму значений
+    удаленных дублей, поэтому список покупок не меняется. Возвращает
+    число удаленных строк.
+    """
+    groups = model.objects.order_by().values(*fields).annotate(
+        keep=Min('pk'), rows=Count('pk')
+    ).filter(rows__gt=1)
+    if sum_field:
+        groups = groups.annotate(total=Sum(sum_field))
+    deleted = 0
+    for group in groups:
+        if sum_field:
+            model.objects.filter(pk=group['keep']).update(
+                **{sum_field: group['total']}
+            )
+        deleted += model.objects.filter(
+            **{field: group[field] for field in fields}
+        ).exclude(pk=group['keep']).delete()[0]
+    return deleted
+
+
+class Command(BaseCommand):
+    help = ('Удаляет повторяющиеся ингредиенты и тэги рецептов, которые '
+            'мешают создать ограничения unique_ingredient_recipe и '
+            'unique_tag_recipe (выполнить до migrate)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ingredients = dedupe(
+                IngredientRecipe, ('recipe_id', 'ingredient_id'), 'amount'
+            )
+            tags = dedupe(TagRecipe, ('recipe_id', 'tag_id'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено повторов: ингредиентов {ingredients}, тэгов {tags}'
+        ))
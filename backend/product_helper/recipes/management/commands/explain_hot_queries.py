@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+def server_name():
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = ('Выполняет GET-запросы к основным эндпоинтам API и печатает '
+            'план (EXPLAIN) каждого SQL-запроса')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='email пользователя, от имени которого идут запросы'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='EXPLAIN ANALYZE (только PostgreSQL)'
+        )
+        parser.add_argument(
+            '--ingredient',
+            default='сах',
+            help='Строка поиска для автодополнения ингредиентов'
+        )
+        parser.add_argument(
+            '--search',
+            default='суп',
+            help='Строка полнотекстового поиска рецептов'
+        )
+
+    def get_user(self, email):
+        users = User.objects.order_by('pk')
+        user = (users.filter(email=email) if email else users).first()
+        if user is None:
+            raise CommandError('Пользователь не найден')
+        return user
+
+    def endpoints(self, options):
+        recipe = Recipe.objects.order_by('-pk').first()
+        slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+        yield 'Список рецептов', reverse('api:resipes-list'), {}
+        yield 'Список рецептов, курсор', reverse('api:resipes-list'), {
+            'pagination': 'cursor'
+        }
+        yield 'Рецепты по тэгам', reverse('api:resipes-list'), {
+            'tags': slugs
+        }
+        yield 'Популярные рецепты', reverse('api:resipes-list'), {
+            'ordering': 'popular'
+        }
+        yield 'Поиск рецептов', reverse('api:resipes-list'), {
+            'search': options['search']
+        }
+        yield 'Избранное', reverse('api:resipes-list'), {'is_favorited': 1}
+        yield 'Список покупок', reverse('api:resipes-list'), {
+            'is_in_shopping_cart': 1
+        }
+        if recipe is not None:
+            yield 'Что приготовить', reverse('api:resipes-cookable'), {
+                'ingredients': list(recipe.ingredients.values_list(
+                    'pk', flat=True
+                )[:3])
+            }
+            yield 'Рецепт', reverse(
+                'api:resipes-detail', kwargs={'pk': recipe.pk}
+            ), {}
+        yield 'Выгрузка списка покупок', reverse(
+            'api:resipes-download_shopping_cart'
+        ), {}
+        yield 'Подписки', reverse('api:users-subscriptions'), {
+            'recipes_limit': 3
+        }
+        yield 'Автодополнение ингредиентов', reverse(
+            'api:ingredients-list'
+        ), {'name': options['ingredient']}
+
+    def explain(self, sql, analyze):
+        if connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif analyze:
+            prefix = 'EXPLAIN ANALYZE '
+        else:
+            prefix = 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+
+    def handle(self, *args, **options):
+        client = APIClient(SERVER_NAME=server_name())
+        client.force_authenticate(self.get_user(options['user']))
+        for title, url, params in self.endpoints(options):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{title}: GET {url} {params} -> {response.status_code}, '
+                f'запросов: {len(queries)}'
+            ))
+            for query in queries:
+                sql = query['sql']
+                self.stdout.write(self.style.SQL_KEYWORD(sql))
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                for line in self.explain(sql, options['analyze']):
+                    self.stdout.write(f'    {line}')
+            self.stdout.write('')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает с нуля счетчики рецептов (избранное, списки '
+            'покупок) и пользователей (рецепты, подписчики)')
+
+    def handle(self, *args, **options):
+        recipes, users = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+        ))
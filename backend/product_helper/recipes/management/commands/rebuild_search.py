@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe
+from recipes.search import update_search_documents
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает поисковые документы рецептов (после загрузки '
+            'данных или изменения настроек поиска)')
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), BATCH_SIZE):
+            with transaction.atomic():
+                update_search_documents(Recipe.objects.filter(
+                    pk__in=ids[start:start + BATCH_SIZE]
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено рецептов: {len(ids)}'
+        ))
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from recipes.counters import count_of
+from recipes.models import Favorite, Recipe, RecipePopularity
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает таблицу популярности рецептов по добавлениям '
+            'в избранное (для запуска по cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.POPULARITY_WINDOW_DAYS,
+            help='Учитывать избранное за последние N дней'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        recent = Favorite.objects.filter(
+            added__gte=now - timedelta(days=options['days'])
+        )
+        # Читатели видят старый рейтинг до фиксации транзакции
+        with transaction.atomic():
+            # Строки рецептов, созданных без сигналов (loaddata,
+            # bulk_create)
+            RecipePopularity.objects.bulk_create(
+                (
+                    RecipePopularity(recipe_id=pk) for pk in
+                    Recipe.objects.filter(
+                        popularity__isnull=True
+                    ).values_list('pk', flat=True)
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True
+            )
+            # Обновляются только строки, рейтинг которых мог измениться
+            RecipePopularity.objects.filter(
+                Q(score__gt=0) | Q(recipe__in=recent.values('recipe'))
+            ).update(
+                score=count_of(recent, 'recipe'), refreshed_at=now
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Рецептов в рейтинге: {}'.format(
+                RecipePopularity.objects.filter(score__gt=0).count()
+            )
+        ))
@@ -1,10 +1,18 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch,
+                              Subquery, Value)
+from django.utils import timezone
 
+from users.models import Subscribtion
 from .validators import CookingTimeValidator, HEXCodeValidator
 
 User = get_user_model()
 
+# Колонки рецепта для SimpleRecipeSerializer
+RECIPE_CARD_FIELDS = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
+
 MEASURE_CHOICES = [
     ('KG', 'кг'),
     ('G', 'г'),
@@ -16,6 +24,8 @@ MEASURE_CHOICES = [
     ('BS', 'ст. л.'),
     ('PN', 'щепотка')
 ]
+# Код единицы -> название, как get_measurement_unit_display()
+MEASURE_UNITS = dict(MEASURE_CHOICES)
 
 
 class Tag(models.Model):
@@ -70,6 +80,96 @@ class Ingredient(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        return instance
+
+    def remember_state(self):
+        """Запоминает колонки, которые попадают в рецепты: по ним
+        recipes/signals.py решает, что обновлять после save()."""
+        self._saved_state = (
+            self.__dict__.get('name'), self.__dict__.get('measurement_unit')
+        )
+
+    @property
+    def saved_state(self):
+        return getattr(self, '_saved_state', (None, None))
+
+
+class CatalogueVersion(models.Model):
+    name = models.CharField(
+        'Справочник',
+        primary_key=True,
+        max_length=32,
+        help_text='Название справочника (тэги, ингредиенты)'
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        help_text='Растет при каждом изменении справочника'
+    )
+    changed_at = models.DateTimeField(
+        'Дата изменения',
+        default=timezone.now,
+        help_text='Когда справочник изменился последний раз'
+    )
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        res = '{name}: {version}'
+        return res.format(name=self.name, version=self.version)
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        """Автор, тэги и ингредиенты для RecipeReadSerializer
+        фиксированным числом запросов."""
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'related_ingredient',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ).order_by('pk')
+            )
+        )
+
+    def latest_per_author(self, limit):
+        """Не больше limit последних рецептов каждого автора одним
+        запросом (коррелированный подзапрос с LIMIT)."""
+        return self.filter(id__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).order_by('-id').values('id')[:limit]
+        ))
+
+    def with_user_flags(self, user):
+        """Флаги is_favorited, is_in_shopping_cart и author_is_subscribed
+        для пользователя user, вычисленные в том же запросе."""
+        if user.is_anonymous:
+            false = Value(False, output_field=BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            author_is_subscribed=Exists(Subscribtion.objects.filter(
+                user=user, author=OuterRef('author')))
+        )
+
 
 class Recipe(models.Model):
     author = models.ForeignKey(
@@ -89,6 +189,20 @@ class Recipe(models.Model):
         upload_to='images/recipes/',
         help_text='Изображения блюда',
     )
+    image_thumbnail = models.ImageField(
+        'Превью',
+        upload_to='images/recipes/thumbnails/',
+        blank=True,
+        editable=False,
+        help_text='Превью для списков, строится в фоне'
+    )
+    image_webp = models.ImageField(
+        'Изображение WebP',
+        upload_to='images/recipes/webp/',
+        blank=True,
+        editable=False,
+        help_text='Изображение для страницы рецепта, строится в фоне'
+    )
     text = models.TextField(
         'Текст',
         help_text='Описание рецепта'
@@ -110,6 +224,25 @@ class Recipe(models.Model):
         validators=(CookingTimeValidator(),),
         help_text='Время приготовления в минутах'
     )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        help_text='Сколько пользователей добавили рецепт в избранное'
+    )
+    carts_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        help_text='Сколько пользователей добавили рецепт в список покупок'
+    )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        help_text='Версия рецепта для кэширования ответов'
+    )
+    # Заполняется только на PostgreSQL, см. search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-id', )
@@ -121,11 +254,18 @@ class Recipe(models.Model):
 
 
 class IngredientRecipe(models.Model):
-    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    # Индекс по ingredient - первая колонка ingredientrecipe_ingredient
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    # Индекс по recipe - первая колонка unique_ingredient_recipe
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='related_ingredient'
+        related_name='related_ingredient',
+        db_index=False
     )
     amount = models.PositiveIntegerField(
         'Количество',
@@ -133,25 +273,53 @@ class IngredientRecipe(models.Model):
         help_text='Количество игредиента'
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_ingredient_recipe'
+                ),
+        )
+        # Подбор рецептов по ингредиентам: ingredient -> recipe_id
+        # без обращения к таблице
+        indexes = (
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='ingredientrecipe_ingredient'
+            ),
+        )
+
 
 class TagRecipe(models.Model):
+    # Индекс по tag - первая колонка unique_tag_recipe
     tag = models.ForeignKey(
         Tag,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('tag', 'recipe'),
+                name='unique_tag_recipe'
+                ),
+        )
+
 
 class Favorite(models.Model):
+    # Индекс по user - первая колонка unique_favorite
     user = models.ForeignKey(
         User,
         verbose_name='Пользователь',
         on_delete=models.CASCADE,
         related_name='favorites',
-        help_text='Владелец списка избранного'
+        help_text='Владелец списка избранного',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -160,6 +328,12 @@ class Favorite(models.Model):
         related_name='users_favorites',
         help_text='Избранные рецепты'
     )
+    added = models.DateTimeField(
+        'Дата добавления',
+        default=timezone.now,
+        db_index=True,
+        help_text='Когда рецепт добавлен в избранное'
+    )
 
     class Meta:
         ordering = ('recipe', )
@@ -177,13 +351,49 @@ class Favorite(models.Model):
         return res.format(username=self.user.username, recipe=self.recipe.name)
 
 
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        help_text='Рецепт в рейтинге'
+    )
+    score = models.PositiveIntegerField(
+        'Популярность',
+        default=0,
+        help_text='Добавлений в избранное за последние дни'
+    )
+    refreshed_at = models.DateTimeField(
+        'Дата расчета',
+        default=timezone.now,
+        help_text='Когда рейтинг был пересчитан'
+    )
+
+    class Meta:
+        indexes = (
+            # В порядке ORDER BY сортировки ?ordering=popular
+            models.Index(fields=('-score', '-recipe'),
+                         name='recipe_popularity_score'),
+        )
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+
+    def __str__(self):
+        res = 'Популярность {recipe}: {score}'
+        return res.format(recipe=self.recipe.name, score=self.score)
+
+
 class ShoppingCart(models.Model):
+    # Индекс по user - первая колонка unique_cart_item
     user = models.ForeignKey(
         User,
         verbose_name='Пользователь',
         on_delete=models.CASCADE,
         related_name='shopping_list',
-        help_text='Владелец списка покупок'
+        help_text='Владелец списка покупок',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -192,6 +402,12 @@ class ShoppingCart(models.Model):
         related_name='users_carts',
         help_text='Корзины пользователей'
     )
+    servings = models.PositiveIntegerField(
+        'Порций',
+        default=1,
+        validators=(CookingTimeValidator(1),),
+        help_text='Множитель количества ингредиентов в списке покупок'
+    )
 
     class Meta:
         ordering = ('recipe', )
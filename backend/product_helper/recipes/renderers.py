@@ -0,0 +1,159 @@
+import csv
+import io
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFError, TTFont
+    from reportlab.pdfgen.canvas import Canvas
+except ImportError:
+    Canvas = None
+
+FILENAME = 'Shopping_cart'
+TITLE = 'Список покупок'
+HEADER = ('Ингридиенты', 'Количество', 'ед. изм.')
+
+SHOPPING_CART_RENDERERS = []
+
+
+def register(renderer_class):
+    SHOPPING_CART_RENDERERS.append(renderer_class)
+    return renderer_class
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    """Выгрузка списка покупок.
+
+    stream() получает итерируемые строки списка (словари с ключами
+    name, amount и unit) и отдает содержимое файла по частям. Файл
+    рендерера с buffered = True собирается целиком до начала ответа.
+    """
+    charset = 'utf-8'
+    buffered = False
+
+    @property
+    def filename(self):
+        return f'{FILENAME}.{self.format}'
+
+    def stream(self, lines):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b''.join(
+            chunk.encode(self.charset) if isinstance(chunk, str) else chunk
+            for chunk in self.stream(data)
+        )
+
+
+@register
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, lines):
+        yield ', '.join(HEADER) + '\n'
+        for line in lines:
+            yield '{name}, {amount}, {unit}\n'.format(**line)
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий записанное."""
+
+    def write(self, value):
+        return value
+
+
+@register
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, lines):
+        writer = csv.writer(Echo())
+        yield writer.writerow(HEADER)
+        for line in lines:
+            yield writer.writerow(
+                (line['name'], line['amount'], line['unit'])
+            )
+
+
+@lru_cache(maxsize=None)
+def pdf_font():
+    """Регистрирует шрифт с кириллицей один раз на процесс."""
+    name = 'ShoppingCartFont'
+    pdfmetrics.registerFont(TTFont(name, settings.SHOPPING_CART_PDF_FONT))
+    return name
+
+
+class PDFShoppingCartRenderer(ShoppingCartRenderer):
+    """PDF собирается в памяти: reportlab пишет таблицу ссылок документа
+    только в save(). Страницы сжимаются по мере заполнения, готовый
+    документ отдается частями по chunk_size.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    buffered = True
+    page_size = A4 if Canvas is not None else None
+    margin = 50
+    font_size = 12
+    title_size = 16
+    leading = 18
+    chunk_size = 64 * 1024
+
+    def font(self):
+        try:
+            return pdf_font()
+        except TTFError:
+            raise exceptions.APIException('Шрифт для PDF недоступен')
+
+    def stream(self, lines):
+        font = self.font()
+        width, height = self.page_size
+        buffer = io.BytesIO()
+        canvas = Canvas(buffer, pagesize=self.page_size, pageCompression=1)
+        canvas.setTitle(TITLE)
+        canvas.setFont(font, self.title_size)
+        canvas.drawString(self.margin, height - self.margin, TITLE)
+        y = height - self.margin - 2 * self.leading
+        canvas.setFont(font, self.font_size)
+        for line in lines:
+            if y < self.margin:
+                # Страница закрывается сразу, в памяти остается только
+                # ее сжатый поток, а не весь список строк
+                canvas.showPage()
+                canvas.setFont(font, self.font_size)
+                y = height - self.margin
+            canvas.drawString(self.margin, y, line['name'])
+            canvas.drawRightString(
+                width - self.margin, y,
+                '{amount} {unit}'.format(**line)
+            )
+            y -= self.leading
+        canvas.save()
+        data = buffer.getbuffer()
+        for start in range(0, len(data), self.chunk_size):
+            yield bytes(data[start:start + self.chunk_size])
+
+
+if Canvas is not None:
+    register(PDFShoppingCartRenderer)
+
+
+class ShoppingCartNegotiation(DefaultContentNegotiation):
+    """Выбор формата по ?format=, без него - первый из зарегистрированных.
+
+    Заголовок Accept фронтенда не должен приводить к 406.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except exceptions.NotAcceptable:
+            return renderers[0], renderers[0].media_type
@@ -0,0 +1,117 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, TextField
+
+from .autocomplete import in_order, uses_postgresql
+from .models import IngredientRecipe, Recipe
+
+SEARCH_CONFIG = 'russian'
+# Веса частей документа: название, ингредиенты, текст (как у ts_rank)
+WEIGHTS = (('A', 1.0), ('B', 0.4), ('C', 0.2))
+WORD = re.compile(r'\w+')
+
+
+def tokens(value):
+    return WORD.findall(value.lower())
+
+
+def recipe_documents(recipes):
+    """(pk, название, названия ингредиентов, текст) рецептов recipes
+    двумя запросами."""
+    ingredients = defaultdict(list)
+    for recipe_id, name in IngredientRecipe.objects.filter(
+        recipe__in=recipes
+    ).values_list('recipe_id', 'ingredient__name'):
+        ingredients[recipe_id].append(name)
+    for pk, name, text in recipes.values_list('pk', 'name', 'text'):
+        yield pk, name, ' '.join(ingredients[pk]), text
+
+
+class RecipeIndex:
+    """Инвертированный индекс рецептов в памяти процесса: слово ->
+    {id рецепта: вес}.
+
+    Используется вместо tsvector на других СУБД (тесты, локальный
+    запуск), без стемминга. Сбрасывается при изменении рецептов.
+    """
+
+    def __init__(self):
+        self._postings = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._postings = None
+
+    @property
+    def postings(self):
+        postings = self._postings
+        if postings is None:
+            with self._lock:
+                postings = defaultdict(lambda: defaultdict(float))
+                for pk, *parts in recipe_documents(Recipe.objects.all()):
+                    for (_, weight), part in zip(WEIGHTS, parts):
+                        for token in tokens(part):
+                            postings[token][pk] += weight
+                self._postings = postings
+        return postings
+
+    def search(self, value):
+        """id рецептов, содержащих все слова value, по убыванию веса."""
+        postings = self.postings
+        scores = None
+        for token in set(tokens(value)):
+            matches = postings.get(token, {})
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {
+                    pk: score + matches[pk]
+                    for pk, score in scores.items() if pk in matches
+                }
+        return sorted(scores or (), key=lambda pk: (-scores[pk], -pk))
+
+
+recipe_index = RecipeIndex()
+
+
+def search_vector(*parts):
+    vector = None
+    for (weight, _), part in zip(WEIGHTS, parts):
+        part_vector = SearchVector(part, config=SEARCH_CONFIG, weight=weight)
+        vector = part_vector if vector is None else vector + part_vector
+    return vector
+
+
+def update_search_documents(recipes):
+    """Пересобирает поисковые документы рецептов queryset recipes одним
+    UPDATE: названия ингредиентов собирает подзапрос string_agg."""
+    if not uses_postgresql(recipes):
+        transaction.on_commit(recipe_index.invalidate, using=recipes.db)
+        return
+    ingredient_names = IngredientRecipe.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    # update() не вызывает save(), updated_at не меняется
+    recipes.update(search_vector=search_vector(
+        F('name'),
+        Subquery(ingredient_names, output_field=TextField()),
+        F('text')
+    ))
+
+
+def search(queryset, value):
+    """Рецепты, содержащие все слова value, по убыванию релевантности."""
+    if not uses_postgresql(queryset):
+        return in_order(queryset, recipe_index.search(value))
+    query = SearchQuery(value, config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-id')
@@ -1,9 +1,15 @@
-from drf_extra_fields.fields import Base64ImageField
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
 from users.serializers import CustomUserSerializer
-from .models import (MEASURE_CHOICES, Favorite, Ingredient,
-                     IngredientRecipe, Recipe, ShoppingCart, Tag)
+from .fields import (BulkPrimaryKeyRelatedField, RecipeImageField,
+                     StreamingBase64ImageField, check_duplicate_ids,
+                     resolve_ids)
+from .images import reset_variants, schedule_variants
+from .models import (MEASURE_CHOICES, Ingredient, IngredientRecipe, Recipe,
+                     Tag, TagRecipe)
+from .search import update_search_documents
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -50,9 +56,8 @@ class IngredientAmountReadSerializer(serializers.ModelSerializer):
 
 
 class IngredientAmountWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    # Ингредиенты разрешаются пачкой в RecipeWriteSerializer
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = IngredientRecipe
@@ -67,7 +72,9 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     author = CustomUserSerializer(
         read_only=True
     )
-    image = Base64ImageField(
+    image = RecipeImageField(
+        variant='image_webp',
+        list_variant='image_thumbnail',
         max_length=None,
         use_url=True,
         required=False
@@ -88,22 +95,39 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = (
             'id', 'name', 'cooking_time', 'author', 'ingredients',
-            'tags', 'image', 'text', 'is_favorited', 'is_in_shopping_cart'
+            'tags', 'image', 'text', 'is_favorited', 'is_in_shopping_cart',
+            'favorites_count'
             )
+        read_only_fields = ('favorites_count',)
+
+    def to_representation(self, instance):
+        # Флаг подписки на автора приходит аннотацией рецепта,
+        # CustomUserSerializer читает его из объекта автора
+        subscribed = getattr(instance, 'author_is_subscribed', None)
+        if subscribed is not None:
+            instance.author.is_subscribed = subscribed
+        return super().to_representation(instance)
 
     def get_is_favorited(self, obj):
+        favorited = getattr(obj, 'is_favorited', None)
+        if favorited is not None:
+            return favorited
         user = self.context['request'].user
         return (not user.is_anonymous and
                 user.favorites.filter(recipe=obj).exists())
 
     def get_is_in_shopping_cart(self, obj):
+        in_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if in_cart is not None:
+            return in_cart
         user = self.context['request'].user
         return (not user.is_anonymous and
                 user.shopping_list.filter(recipe=obj).exists())
 
 
 class SimpleRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(
+    image = RecipeImageField(
+        variant='image_thumbnail',
         max_length=None,
         use_url=True,
         required=True
@@ -119,12 +143,55 @@ class SimpleRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = BulkPrimaryKeyRelatedField(
+        queryset=Recipe.objects.only('id'),
+        allow_empty=False
+    )
+
+
+class ServingsSerializer(serializers.Serializer):
+    # Без значения новые строки получают servings по умолчанию модели,
+    # а у уже добавленных оно не меняется
+    servings = serializers.IntegerField(min_value=1, required=False)
+
+
+class CartRecipesSerializer(RecipeIdsSerializer, ServingsSerializer):
+    pass
+
+
+class CookableQuerySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=100,
+        default=settings.COOKABLE_RECIPES_LIMIT
+    )
+
+
+class CookableRecipeSerializer(SimpleRecipeSerializer):
+    covered = serializers.IntegerField(read_only=True)
+    total = serializers.IntegerField(read_only=True)
+    missing_ingredients = IngredientAmountReadSerializer(
+        read_only=True,
+        many=True,
+        source='missing'
+    )
+
+    class Meta(SimpleRecipeSerializer.Meta):
+        fields = SimpleRecipeSerializer.Meta.fields + (
+            'covered', 'total', 'missing_ingredients'
+        )
+
+
 class RecipeWriteSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
+    tags = BulkPrimaryKeyRelatedField(
+        queryset=Tag.objects.all()
     )
-    image = Base64ImageField(
+    image = StreamingBase64ImageField(
         max_length=None,
         use_url=True,
         required=True
@@ -147,56 +214,108 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
+    def validate_ingredients(self, value):
+        pks = [ingredient['id'] for ingredient in value]
+        check_duplicate_ids(pks)
+        for ingredient, obj in zip(
+            value, resolve_ids(Ingredient.objects.all(), pks)
+        ):
+            ingredient['id'] = obj
+        return value
+
     def create(self, validated_data):
         author = self.context['request'].user
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('related_ingredient')
-        recipe = Recipe.objects.create(**validated_data, author=author)
-        self.add_tags_and_ingredients(tags, ingredients, recipe)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data, author=author)
+            TagRecipe.objects.bulk_create(
+                TagRecipe(recipe=recipe, tag=tag) for tag in tags
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe,
+                    ingredient=ingredient['id'],
+                    amount=ingredient['amount']
+                )
+                for ingredient in ingredients
+            )
+            update_search_documents(Recipe.objects.filter(pk=recipe.pk))
+            schedule_variants(recipe)
         return recipe
 
     def update(self, instance, validated_data):
-        # TODO: наверняка можно по-красивее сделать
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time',
-            instance.cooking_time
-        )
-        if validated_data.get('image') is not None:
-            instance.image = validated_data.get('image', instance.image)
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('related_ingredient')
-        self.add_tags_and_ingredients(tags, ingredients, instance)
-        super().update(instance, validated_data)
+        if validated_data.get('image') is None:
+            validated_data.pop('image', None)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('related_ingredient', None)
+        if 'image' in validated_data:
+            reset_variants(instance)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if tags is not None:
+                self.update_tags(instance, tags)
+            if ingredients is not None:
+                self.update_ingredients(instance, ingredients)
+            update_search_documents(Recipe.objects.filter(pk=instance.pk))
+            if 'image' in validated_data:
+                schedule_variants(instance)
         return instance
 
-    def add_tags_and_ingredients(self, tags, ingredients, recipe):
-        # TODO: наверняка можно по-красивее сделать
-        recipe.tags.set(tags)
-        IngredientRecipe.objects.filter(recipe=recipe).delete()
-        for ingredient in ingredients:
-            IngredientRecipe.objects.create(
-                recipe=recipe,
-                amount=ingredient['amount'],
-                ingredient=ingredient['id']
+    def update_tags(self, recipe, tags):
+        current = set(
+            TagRecipe.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True)
+        )
+        new = {tag.id for tag in tags}
+        if current - new:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=current - new
+            ).delete()
+        if new - current:
+            TagRecipe.objects.bulk_create(
+                TagRecipe(recipe=recipe, tag_id=tag_id)
+                for tag_id in new - current
+            )
+
+    def update_ingredients(self, recipe, ingredients):
+        current = {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        new = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - new.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, row in current.items():
+            if ingredient_id in new and row.amount != new[ingredient_id]:
+                row.amount = new[ingredient_id]
+                changed.append(row)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ('amount',))
+        added = new.keys() - current.keys()
+        if added:
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=new[ingredient_id]
+                )
+                for ingredient_id in added
             )
 
     def to_representation(self, instanse):
+        request = self.context.get('request')
+        recipe = Recipe.objects.with_related().with_user_flags(
+            request.user
+        ).get(pk=instanse.pk)
         return RecipeReadSerializer(
-            instanse,
-            context={'request': self.context.get('request')}
+            recipe,
+            context={'request': request}
         ).data
-
-
-# TODO: Эти два почти одинаковые. Объединить?
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = ShoppingCart
-        fields = ('user', 'recipe')
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
-    class Meta:
-        fields = ('user', 'recipe')
-        model = Favorite
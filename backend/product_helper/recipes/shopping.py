@@ -0,0 +1,59 @@
+from django.db.models import (Case, CharField, F, IntegerField, Sum, Value,
+                              When)
+
+from .models import MEASURE_UNITS, IngredientRecipe
+
+# Единица -> (базовая единица, множитель)
+UNIT_CONVERSIONS = {
+    'KG': ('G', 1000),
+    'L': ('ML', 1000),
+    'BS': ('MS', 3),
+}
+
+
+def unit_case(prefix, index, default, output_field):
+    return Case(
+        *(When(**{f'{prefix}measurement_unit': unit},
+               then=Value(conversion[index]))
+          for unit, conversion in UNIT_CONVERSIONS.items()),
+        default=default,
+        output_field=output_field
+    )
+
+
+def aggregate_ingredients(rows, multiplier=None):
+    """Суммы ингредиентов строк IngredientRecipe rows в базовых единицах.
+
+    Пересчет единиц и умножение на multiplier (выражение, например
+    число порций) выполняются в SQL, результат - один GROUP BY запрос
+    со строками name, unit, total.
+    """
+    amount = F('amount') * unit_case(
+        'ingredient__', 1, Value(1), IntegerField()
+    )
+    if multiplier is not None:
+        amount = amount * multiplier
+    return rows.values(
+        name=F('ingredient__name'),
+        unit=unit_case(
+            'ingredient__', 0, F('ingredient__measurement_unit'),
+            CharField()
+        )
+    ).annotate(total=Sum(amount)).order_by('name')
+
+
+def shopping_list(user):
+    """Список покупок пользователя с учетом порций в корзине."""
+    return aggregate_ingredients(
+        IngredientRecipe.objects.filter(recipe__users_carts__user=user),
+        F('recipe__users_carts__servings')
+    )
+
+
+def shopping_list_lines(ingredients):
+    for line in ingredients.iterator():
+        yield {
+            'name': line['name'],
+            'amount': line['total'],
+            'unit': MEASURE_UNITS[line['unit']]
+        }
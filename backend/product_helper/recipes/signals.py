@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .autocomplete import ingredient_index
+from .cache import ingredient_catalogue, tag_catalogue
+from .cookable import invalidate_coverage
+from .counters import change_counter, change_user_counter, deleting_users
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     RecipePopularity, ShoppingCart, Tag, TagRecipe)
+from .search import update_search_documents
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+    ingredient_catalogue.invalidate()
+
+
+# Новая версия рецептов для кэша ингредиентов и тэгов (rows.py) и ETag.
+# Удаление ингредиента или тэга обновляет рецепты до каскада по
+# IngredientRecipe и TagRecipe.
+def touch_recipes(recipes):
+    recipes.update(updated_at=timezone.now())
+
+
+# У нового ингредиента рецептов нет. Поисковые документы зависят только
+# от названия, строки ингредиентов рецепта - еще и от единицы измерения.
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes(instance, created, raw=False, **kwargs):
+    name, measurement_unit = instance.saved_state
+    instance.remember_state()
+    if created or raw:
+        return
+    name_changed = name != instance.name
+    if name_changed or measurement_unit != instance.measurement_unit:
+        recipes = Recipe.objects.filter(
+            related_ingredient__ingredient=instance
+        )
+        if name_changed:
+            update_search_documents(recipes)
+        touch_recipes(recipes)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def touch_deleted_ingredient_recipes(instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(
+        related_ingredient__ingredient=instance
+    ))
+
+
+# Индекс покрытия (cookable.py) зависит от состава рецептов: удаление
+# ингредиента убирает его строки каскадом, а RecipeWriteSerializer и
+# админка, меняя строки IngredientRecipe, сохраняют и сам рецепт
+@receiver(post_delete, sender=Ingredient)
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver(post_save, sender=IngredientRecipe)
+def change_coverage(**kwargs):
+    invalidate_coverage()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    tag_catalogue.invalidate()
+
+
+@receiver((post_save, pre_delete), sender=Tag)
+def touch_tag_recipes(instance, raw=False, **kwargs):
+    if not raw:
+        touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+# bulk_create сигналы не отправляет, но RecipeWriteSerializer и админка
+# при этом сохраняют сам рецепт, поэтому и удаления строк обработчиков
+# не имеют: каскады от рецепта, ингредиента и тэга удаляют их одним
+# DELETE
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_save, sender=TagRecipe)
+def touch_recipe(instance, raw=False, **kwargs):
+    if not raw:
+        touch_recipes(Recipe.objects.filter(pk=instance.recipe_id))
+
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'carts_count',
+}
+
+
+# update() не вызывает save(), поэтому updated_at рецепта не меняется.
+# Удаления обработчиков не имеют, чтобы каскады от рецепта и
+# пользователя удаляли строки одним DELETE: счетчики уменьшают
+# RelationToggle, release_user_counters и админка.
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, raw=False,
+                             **kwargs):
+    if created and not raw:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.author_id, 'recipes_count', 1)
+
+
+# Сортировка ?ordering=popular соединяет рецепты с RecipePopularity
+# без LEFT JOIN, рецепты из loaddata и bulk_create получают строку в
+# refresh_popularity
+@receiver(post_save, sender=Recipe)
+def create_popularity(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RecipePopularity.objects.create(recipe=instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    if instance.author_id not in deleting_users.ids:
+        change_user_counter(instance.author_id, 'recipes_count', -1)
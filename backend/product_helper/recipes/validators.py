@@ -3,6 +3,9 @@ from django.core.validators import MinValueValidator, RegexValidator
 UNVALID_HEX_MESSAGE = ('Неверный формат hex-кода, попробуйте еще раз '
                        '(например, #49B64E)')
 ZERO_AMOUNT_MESSAGE = ('Значение не может быть рано 0')
+DUPLICATE_IDS_MESSAGE = 'Повторяющиеся id: {ids}'
+MISSING_IDS_MESSAGE = 'Объекты с id {ids} не найдены'
+IMAGE_TOO_LARGE_MESSAGE = 'Размер изображения больше {limit} байт'
 
 
 class HEXCodeValidator(RegexValidator):
@@ -1,34 +1,46 @@
-import os
-
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from api.pagination import OptionalCursorPaginationMixin
+from api.relations import RelationToggle
+from .cache import CatalogueCacheMixin, ingredient_catalogue, tag_catalogue
+from .conditional import make_etag, not_modified, set_validators
+from .cookable import cookable_recipes
 from .filters import IngredientFilter, RecipeFilter
-from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                     ShoppingCart, Tag, User)
+from .models import (RECIPE_CARD_FIELDS, Favorite, Ingredient, Recipe,
+                     ShoppingCart, Tag)
 from .permissions import AuthorOrReadOnly
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeReadSerializer, RecipeWriteSerializer,
-                          ShoppingCartSerializer, SimpleRecipeSerializer,
-                          TagSerializer)
-
+from .renderers import SHOPPING_CART_RENDERERS, ShoppingCartNegotiation
+from .rows import recipe_dicts, recipe_rows
+from .serializers import (CartRecipesSerializer, CookableQuerySerializer,
+                          CookableRecipeSerializer, IngredientSerializer,
+                          RecipeIdsSerializer, RecipeReadSerializer,
+                          RecipeWriteSerializer, ServingsSerializer,
+                          SimpleRecipeSerializer, TagSerializer)
+from .shopping import shopping_list, shopping_list_lines
 
-FILENAME = 'Shopping_cart.txt'
-FILETYPE = 'text/plain; charset="UTF-8"'
+favorite_relation = RelationToggle(
+    Favorite, 'recipe', Recipe, 'favorites_count'
+)
+cart_relation = RelationToggle(ShoppingCart, 'recipe', Recipe, 'carts_count')
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CatalogueCacheMixin, viewsets.ReadOnlyModelViewSet):
+    catalogue = tag_catalogue
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny, )
     pagination_class = None
     queryset = Tag.objects.all()
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogueCacheMixin, viewsets.ReadOnlyModelViewSet):
+    catalogue = ingredient_catalogue
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny, )
     pagination_class = None
@@ -37,11 +49,90 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(OptionalCursorPaginationMixin, viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (AuthorOrReadOnly,)
+    cursor_conflicting_params = ('ordering', 'search')
+
+    def get_queryset(self):
+        queryset = Recipe.objects.all()
+        if self.action in ('favorite', 'shopping_cart', 'destroy'):
+            return queryset
+        return queryset.with_related().with_user_flags(self.request.user)
+
+    def get_etag(self, recipes, *extra):
+        """ETag из версий и счетчиков рецептов, флагов зрителя и данных
+        авторов, без запуска сериализатора. Изменения тэгов и
+        ингредиентов обновляют updated_at их рецептов (см. signals.py).
+
+        recipes - объекты рецептов или строки recipe_rows."""
+        parts = list(extra)
+        for recipe in recipes:
+            if isinstance(recipe, dict):
+                parts.extend((
+                    recipe['id'], recipe['updated_at'].timestamp(),
+                    recipe['favorites_count'], recipe['is_favorited'],
+                    recipe['is_in_shopping_cart'],
+                    recipe['author_is_subscribed'], recipe['author_id'],
+                    recipe['author__email'], recipe['author__username'],
+                    recipe['author__first_name'], recipe['author__last_name']
+                ))
+                continue
+            author = recipe.author
+            parts.extend((
+                recipe.pk, recipe.updated_at.timestamp(),
+                recipe.favorites_count, recipe.is_favorited,
+                recipe.is_in_shopping_cart, recipe.author_is_subscribed,
+                author.pk, author.email, author.username,
+                author.first_name, author.last_name
+            ))
+        return make_etag(*parts)
+
+    def serialize_list(self, recipes):
+        if settings.RECIPE_FAST_SERIALIZATION:
+            return recipe_dicts(recipes, self.request, 'image_thumbnail')
+        return self.get_serializer(recipes, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if settings.RECIPE_FAST_SERIALIZATION:
+            queryset = recipe_rows(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            etag = self.get_etag(queryset)
+        else:
+            # У курсорной пагинации нет общего количества
+            django_page = getattr(self.paginator, 'page', None)
+            count = getattr(getattr(django_page, 'paginator', None),
+                            'count', None)
+            etag = self.get_etag(page, count)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        if page is None:
+            response = Response(self.serialize_list(queryset))
+        else:
+            response = self.get_paginated_response(self.serialize_list(page))
+        return set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        if settings.RECIPE_FAST_SERIALIZATION:
+            instance = get_object_or_404(
+                recipe_rows(self.get_queryset()), pk=self.kwargs['pk']
+            )
+            self.check_object_permissions(request, instance)
+        else:
+            instance = self.get_object()
+        etag = self.get_etag((instance,))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        if settings.RECIPE_FAST_SERIALIZATION:
+            data = recipe_dicts((instance,), request, 'image_webp')[0]
+        else:
+            data = self.get_serializer(instance).data
+        return set_validators(Response(data), etag)
 
     def get_serializer_class(self):
         if self.action in ('shopping_cart', 'favorite'):
@@ -50,74 +141,125 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeWriteSerializer
         return RecipeReadSerializer
 
+    def toggle_recipe(self, request, relation, **fields):
+        pk = int(self.kwargs['pk'])
+        if request.method == 'DELETE':
+            if not relation.remove(request.user, (pk,)):
+                get_object_or_404(Recipe.objects.only('id'), pk=pk)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        recipe = get_object_or_404(
+            Recipe.objects.only(*RECIPE_CARD_FIELDS).annotate(
+                related=relation.exists(request.user)
+            ),
+            pk=pk
+        )
+        relation.add(
+            request.user, (pk,), {pk} if recipe.related else (), **fields
+        )
+        return Response(self.get_serializer(recipe).data)
+
     @action(methods=('post', 'delete'), detail=False,
             url_path=r'(?P<pk>\d+)/favorite',
             permission_classes=(permissions.IsAuthenticated,))
     def favorite(self, request, **kwargs):
-        user = get_object_or_404(User, id=request.user.id)
-        recipe = get_object_or_404(Recipe, id=self.kwargs.get('pk'))
-        if request.method == 'POST':
-            favorite_serializer = FavoriteSerializer(
-                data={'user': user.id, 'recipe': recipe.id}
-            )
-            favorite_serializer.is_valid(raise_exception=True)
-            favorite_serializer.save()
-            return self.retrieve(request)
-        elif request.method == 'DELETE':
-            favorite = get_object_or_404(Favorite, user=user, recipe=recipe)
-            favorite.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+        return self.toggle_recipe(request, favorite_relation)
 
     @action(methods=('post', 'delete'), detail=False,
             url_path=r'(?P<pk>\d+)/shopping_cart',
             permission_classes=(permissions.IsAuthenticated,))
     def shopping_cart(self, request, *args, **kwargs):
-        user = get_object_or_404(User, id=request.user.id)
-        recipe = get_object_or_404(Recipe, id=self.kwargs.get('pk'))
+        servings = ServingsSerializer(data=request.data)
+        servings.is_valid(raise_exception=True)
+        return self.toggle_recipe(
+            request, cart_relation, **servings.validated_data
+        )
+
+    def bulk_recipes(self, request, relation, serializer_class):
+        serializer = serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        fields = dict(serializer.validated_data)
+        ids = [recipe.pk for recipe in fields.pop('recipes')]
+        existing = relation.existing(request.user, ids)
         if request.method == 'POST':
-            shop_serializer = ShoppingCartSerializer(
-                data={'user': user.id, 'recipe': recipe.id}
-            )
-            shop_serializer.is_valid(raise_exception=True)
-            shop_serializer.save()
-            return self.retrieve(request)
-        elif request.method == 'DELETE':
-            cart = get_object_or_404(ShoppingCart, user=user, recipe=recipe)
-            cart.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+            summary = {
+                'added': relation.add(request.user, ids, existing, **fields)
+            }
+        else:
+            removed = [pk for pk in ids if pk in existing]
+            relation.remove(request.user, removed)
+            summary = {'removed': removed}
+        summary['count'] = relation.rows(request.user).count()
+        return Response(summary)
+
+    @action(methods=('post', 'delete'), detail=False,
+            url_path='favorite',
+            permission_classes=(permissions.IsAuthenticated,))
+    def favorite_bulk(self, request, *args, **kwargs):
+        return self.bulk_recipes(request, favorite_relation,
+                                 RecipeIdsSerializer)
+
+    @action(methods=('post', 'delete'), detail=False,
+            url_path='shopping_cart',
+            permission_classes=(permissions.IsAuthenticated,))
+    def shopping_cart_bulk(self, request, *args, **kwargs):
+        return self.bulk_recipes(request, cart_relation,
+                                 CartRecipesSerializer)
+
+    @action(methods=('delete',), detail=False,
+            url_path='shopping_cart/clear',
+            permission_classes=(permissions.IsAuthenticated,))
+    def clear_shopping_cart(self, request, *args, **kwargs):
+        removed = list(cart_relation.rows(request.user).values_list(
+            'recipe_id', flat=True
+        ))
+        cart_relation.remove(request.user, removed)
+        return Response({'removed': removed, 'count': 0})
+
+    @action(methods=('get',), detail=False,
+            url_path='cookable',
+            permission_classes=(permissions.AllowAny,))
+    def cookable(self, request, *args, **kwargs):
+        query = CookableQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        recipes = cookable_recipes(
+            query.validated_data['ingredients'],
+            query.validated_data['limit']
+        )
+        return Response(CookableRecipeSerializer(
+            recipes, many=True, context=self.get_serializer_context()
+        ).data)
 
     @action(methods=('get',), detail=False,
             url_path='download_shopping_cart',
             url_name='download_shopping_cart',
-            permission_classes=(permissions.IsAuthenticated,))
+            permission_classes=(permissions.IsAuthenticated,),
+            renderer_classes=SHOPPING_CART_RENDERERS,
+            content_negotiation_class=ShoppingCartNegotiation)
     def download_shopping_cart(self, request, *args, **kwargs):
-        # TODO сделать pdf
-        user = get_object_or_404(User, id=request.user.id)
-        recipes = user.shopping_list.values_list('recipe', flat=True)
-        queryset = IngredientRecipe.objects.filter(recipe__in=recipes).all()
-        result = {}
-        for ing_res in queryset:
-            ing = ing_res.ingredient
-            if ing.name not in result.keys():
-                result[ing.name] = {
-                    'name': ing.name,
-                    'amount': ing_res.amount,
-                    'unit': ing.get_measurement_unit_display()
-                }
-            else:
-                result[ing.name]['amount'] += ing_res.amount
-
-        lines = ['Ингридиенты, Количество, ед. изм.\n']
-        for line in result.values():
-            lines.append('{name}, {amount}, {unit}\n'.format(**line))
-
-        with open(FILENAME, 'x') as shopping_list:
-            shopping_list.writelines(lines)
-        with open(FILENAME, 'r') as shopping_list:
-            response = HttpResponse(shopping_list, content_type=FILETYPE)
-            response['Content-Disposition'] = ('attachment;'
-                                               f'filename="{FILENAME}"')
-        os.remove(os.path.abspath(FILENAME))
+        renderer = request.accepted_renderer
+        lines = shopping_list_lines(shopping_list(request.user))
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        if renderer.buffered:
+            # Ошибки сборки файла (например, шрифта PDF) еще можно
+            # вернуть в ответе
+            response = HttpResponse(
+                renderer.render(lines), content_type=content_type
+            )
+        else:
+            response = StreamingHttpResponse(
+                renderer.stream(lines),
+                content_type=content_type
+            )
+        response['Content-Disposition'] = ('attachment;'
+                                           f'filename="{renderer.filename}"')
+        return response
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if self.action == 'download_shopping_cart':
+            # Ошибки выгрузки отдаются в JSON, а не в формате файла
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
         return response
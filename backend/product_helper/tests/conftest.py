@@ -0,0 +1,102 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.autocomplete import ingredient_index
+from recipes.cache import ingredient_catalogue, tag_catalogue
+from recipes.cookable import coverage_index
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
+                            TagRecipe)
+from recipes.search import recipe_index
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кэши процесса переживают откат транзакции теста, а id и версии
+    справочников в следующем тесте повторяются."""
+    ingredient_index.invalidate()
+    recipe_index.invalidate()
+    coverage_index.invalidate()
+    tag_catalogue.reset()
+    ingredient_catalogue.reset()
+    caches[settings.RECIPE_CACHE_ALIAS].clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='user', email='user@example.com', password='password'
+    )
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username='author', email='author@example.com', password='password'
+    )
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tags():
+    return [
+        Tag.objects.create(
+            name=f'Тэг {i}', color=f'#00000{i}', slug=f'tag-{i}'
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(name=f'Ингредиент {i}', measurement_unit='G')
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def make_recipes(tags, ingredients):
+    """Создает count рецептов author с тэгами и ингредиентами."""
+    def make_recipes(author, count):
+        recipes = [
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {i}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png'
+            )
+            for i in range(count)
+        ]
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=5)
+            for recipe in recipes for ingredient in ingredients
+        )
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes for tag in tags
+        )
+        return recipes
+    return make_recipes
+
+
+@pytest.fixture
+def count_queries():
+    """Выполняет запрос клиента, возвращает (ответ, число SQL-запросов)."""
+    def count_queries(client, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data, format='json')
+        return response, len(queries)
+    return count_queries
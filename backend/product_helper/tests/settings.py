@@ -0,0 +1,17 @@
+import os
+
+os.environ.setdefault('DJANGO_KEY', 'tests')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver,localhost')
+
+from product_helper.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Миграции генерируются при развертывании и не хранятся в репозитории,
+# таблицы тестовой базы строятся по моделям
+MIGRATION_MODULES = {'api': None, 'recipes': None, 'users': None}
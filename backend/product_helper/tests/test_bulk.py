@@ -0,0 +1,100 @@
+import pytest
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+pytestmark = pytest.mark.django_db
+
+FAVORITE_URL = '/api/recipes/favorite/'
+CART_URL = '/api/recipes/shopping_cart/'
+
+
+def ids(recipes):
+    return [recipe.pk for recipe in recipes]
+
+
+@pytest.mark.parametrize('url, model, counter', (
+    (FAVORITE_URL, Favorite, 'favorites_count'),
+    (CART_URL, ShoppingCart, 'carts_count'),
+))
+def test_bulk_add_and_remove(
+    url, model, counter, user, user_client, author, make_recipes
+):
+    first, second, third = make_recipes(author, 3)
+    model.objects.create(user=user, recipe=first)
+    response = user_client.post(
+        url, {'recipes': ids((first, second, third))}, format='json'
+    )
+    assert response.status_code == 200
+    assert response.data == {'added': ids((second, third)), 'count': 3}
+    response = user_client.delete(
+        url, {'recipes': ids((first, second))}, format='json'
+    )
+    assert response.status_code == 200
+    assert sorted(response.data['removed']) == ids((first, second))
+    assert response.data['count'] == 1
+    counters = dict(Recipe.objects.values_list('pk', counter))
+    assert counters == {first.pk: 0, second.pk: 0, third.pk: 1}
+
+
+def test_bulk_cart_sets_servings(user, user_client, author, make_recipes):
+    recipes = make_recipes(author, 2)
+    user_client.post(
+        CART_URL, {'recipes': ids(recipes), 'servings': 4}, format='json'
+    )
+    assert set(ShoppingCart.objects.filter(user=user).values_list(
+        'servings', flat=True
+    )) == {4}
+
+
+@pytest.mark.parametrize('method', ('post', 'delete'))
+def test_bulk_queries_do_not_grow_with_ids(
+    method, user, user_client, author, make_recipes, count_queries
+):
+    recipes = make_recipes(author, 21)
+    if method == 'delete':
+        for recipe in recipes:
+            Favorite.objects.create(user=user, recipe=recipe)
+    # Одна новая связь сохраняется отдельным путем, пакеты - от двух
+    _, two = count_queries(
+        user_client, method, FAVORITE_URL, {'recipes': ids(recipes[:2])}
+    )
+    response, many = count_queries(
+        user_client, method, FAVORITE_URL, {'recipes': ids(recipes[2:])}
+    )
+    assert response.status_code == 200
+    assert many == two
+
+
+def test_bulk_rejects_bad_ids(user, user_client, author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    response = user_client.post(
+        FAVORITE_URL, {'recipes': [recipe.pk, recipe.pk]}, format='json'
+    )
+    assert response.status_code == 400
+    assert response.data == {'recipes': [f'Повторяющиеся id: {recipe.pk}']}
+    response = user_client.post(
+        FAVORITE_URL, {'recipes': [recipe.pk, 998, 999]}, format='json'
+    )
+    assert response.status_code == 400
+    assert response.data == {'recipes': ['Объекты с id 998, 999 не найдены']}
+    assert not Favorite.objects.exists()
+
+
+def test_clear_shopping_cart(user, user_client, author, make_recipes):
+    recipes = make_recipes(author, 3)
+    for recipe in recipes:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=author, recipe=recipes[0])
+    response = user_client.delete(f'{CART_URL}clear/')
+    assert response.status_code == 200
+    assert sorted(response.data['removed']) == ids(recipes)
+    assert response.data['count'] == 0
+    assert list(ShoppingCart.objects.values_list('user', flat=True)) == [
+        author.pk
+    ]
+    assert Recipe.objects.get(pk=recipes[0].pk).carts_count == 1
+
+
+def test_bulk_requires_authentication(client):
+    response = client.post(FAVORITE_URL, {'recipes': [1]}, format='json')
+    assert response.status_code == 401
@@ -0,0 +1,38 @@
+import pytest
+
+from recipes.models import Ingredient, Tag
+
+CATALOGUES = ('/api/tags/', '/api/ingredients/')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', CATALOGUES)
+def test_catalogue_not_modified(url, client, tags, ingredients,
+                                django_assert_num_queries):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    etag = response['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, model', (
+    ('/api/tags/', Tag), ('/api/ingredients/', Ingredient)
+))
+def test_catalogue_changes_etag(url, model, client, tags, ingredients):
+    etag = client.get(url)['ETag']
+    obj = model.objects.first()
+    obj.name = 'Новое название'
+    obj.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert 'Новое название' in [item['name'] for item in response.json()]
@@ -0,0 +1,50 @@
+import pytest
+
+from recipes.models import Favorite, Recipe
+
+RECIPES_URL = '/api/recipes/'
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    return make_recipes(author, 2)[0]
+
+
+def urls(recipe):
+    return (RECIPES_URL, f'{RECIPES_URL}{recipe.pk}/')
+
+
+@pytest.mark.django_db
+def test_not_modified(user_client, recipe):
+    for url in urls(recipe):
+        response = user_client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+        response = user_client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_viewer_flag_changes_etag(user, user_client, recipe):
+    for url in urls(recipe):
+        etag = user_client.get(url)['ETag']
+        Favorite.objects.create(user=user, recipe=recipe)
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        user_client.delete(f'{RECIPES_URL}{recipe.pk}/favorite/')
+        assert user_client.get(url)['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_update_changes_etag(user_client, recipe):
+    for url in urls(recipe):
+        etag = user_client.get(url)['ETag']
+        Recipe.objects.get(pk=recipe.pk).save()
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
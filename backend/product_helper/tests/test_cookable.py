@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from recipes.cookable import coverage_index
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+
+pytestmark = pytest.mark.django_db
+
+COOKABLE_URL = '/api/recipes/cookable/'
+
+
+def test_cookable_ranks_by_coverage(client, author, ingredients, make_recipes):
+    full, partial, unrelated = make_recipes(author, 3)
+    first, second, third = ingredients
+    IngredientRecipe.objects.filter(recipe=full, ingredient=third).delete()
+    IngredientRecipe.objects.filter(
+        recipe=unrelated, ingredient__in=(first, second)
+    ).delete()
+    response = client.get(
+        COOKABLE_URL, {'ingredients': [first.pk, second.pk]}
+    )
+    assert response.status_code == 200
+    assert [
+        (recipe['id'], recipe['covered'], recipe['total'])
+        for recipe in response.data
+    ] == [(full.pk, 2, 2), (partial.pk, 2, 3)]
+    assert [
+        ingredient['id']
+        for ingredient in response.data[1]['missing_ingredients']
+    ] == [third.pk]
+
+
+def test_cookable_limit(client, author, ingredients, make_recipes):
+    make_recipes(author, 3)
+    response = client.get(
+        COOKABLE_URL, {'ingredients': ingredients[0].pk, 'limit': 2}
+    )
+    assert len(response.data) == 2
+
+
+def test_cookable_index_matches_grouping(author):
+    rng = random.Random(1)
+    pantry = [
+        Ingredient.objects.create(name=f'Продукт {i}', measurement_unit='G')
+        for i in range(12)
+    ]
+    recipes = [
+        Recipe.objects.create(
+            author=author, name=f'Рецепт {i}', text='Текст',
+            cooking_time=10, image='recipes/images/recipe.png'
+        )
+        for i in range(300)
+    ]
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+        for recipe in recipes
+        for ingredient in rng.sample(pantry, rng.randint(1, 6))
+    )
+    rows = IngredientRecipe.objects.values_list('recipe_id', 'ingredient_id')
+    # Во втором наборе ингредиентов нет в рецептах: покрыто меньше, чем
+    # в наборе ингредиентов
+    for on_hand in (
+        {ingredient.pk for ingredient in pantry[:5]},
+        {pantry[0].pk, pantry[1].pk, *range(1000, 1006)},
+    ):
+        coverage = {}
+        for recipe_id, ingredient_id in rows:
+            covered, total = coverage.get(recipe_id, (0, 0))
+            coverage[recipe_id] = (
+                covered + (ingredient_id in on_hand), total + 1
+            )
+        expected = sorted(
+            (pk for pk, (covered, _) in coverage.items() if covered),
+            key=lambda pk: (
+                -coverage[pk][0] / coverage[pk][1], -coverage[pk][0], -pk
+            )
+        )
+        assert coverage_index.search(on_hand, 50) == expected[:50]
+
+
+def test_cookable_index_follows_recipe_changes(client, author, ingredients,
+                                               make_recipes, settings):
+    settings.COOKABLE_INDEX_MAX_AGE = 0
+    first, second = make_recipes(author, 2)
+    IngredientRecipe.objects.filter(recipe=first).delete()
+    params = {'ingredients': ingredients[0].pk}
+    response = client.get(COOKABLE_URL, params)
+    assert [recipe['id'] for recipe in response.data] == [second.pk]
+    IngredientRecipe.objects.create(
+        recipe=first, ingredient=ingredients[0], amount=1
+    )
+    response = client.get(COOKABLE_URL, params)
+    assert [recipe['id'] for recipe in response.data] == [first.pk, second.pk]
+
+
+def test_cookable_reads_coverage_from_db(client, author, ingredients,
+                                         make_recipes,
+                                         django_assert_num_queries):
+    recipe, = make_recipes(author, 1)
+    params = {'ingredients': ingredients[0].pk}
+    client.get(COOKABLE_URL, params)
+    # Индекс пересоберется не раньше COOKABLE_INDEX_MAX_AGE
+    IngredientRecipe.objects.filter(
+        recipe=recipe, ingredient=ingredients[2]
+    ).delete()
+    with django_assert_num_queries(2):
+        response = client.get(COOKABLE_URL, params)
+    assert (response.data[0]['covered'], response.data[0]['total']) == (1, 2)
+
+
+@pytest.mark.parametrize('params', (
+    {},
+    {'ingredients': 'x'},
+    {'ingredients': 1, 'limit': 101},
+))
+def test_cookable_rejects_bad_query(client, params):
+    assert client.get(COOKABLE_URL, params).status_code == 400
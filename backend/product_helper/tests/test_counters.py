@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.counters import rebuild_counters
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribtion, UserStats
+
+pytestmark = pytest.mark.django_db
+
+
+def test_signals_keep_counters(user, author, make_recipes):
+    recipe, other = make_recipes(author, 2)
+    Favorite.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    Subscribtion.objects.create(user=user, author=author)
+    recipe.refresh_from_db()
+    stats = UserStats.objects.get(user=author)
+    assert (recipe.favorites_count, recipe.carts_count) == (1, 1)
+    assert (stats.recipes_count, stats.followers_count) == (2, 1)
+    other.delete()
+    user.delete()
+    recipe.refresh_from_db()
+    stats.refresh_from_db()
+    assert (recipe.favorites_count, recipe.carts_count) == (0, 0)
+    assert (stats.recipes_count, stats.followers_count) == (1, 0)
+
+
+def test_rebuild_counters_repairs_drift(user, author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    Favorite.objects.create(user=user, recipe=recipe)
+    Subscribtion.objects.create(user=user, author=author)
+    Recipe.objects.update(favorites_count=7, carts_count=7)
+    UserStats.objects.all().delete()
+    rebuild_counters()
+    recipe.refresh_from_db()
+    assert (recipe.favorites_count, recipe.carts_count) == (1, 0)
+    assert UserStats.objects.filter(user=user).exists()
+    stats = UserStats.objects.get(user=author)
+    assert (stats.recipes_count, stats.followers_count) == (1, 1)
+
+
+def test_recipe_shows_favorites_count(user, client, author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    Favorite.objects.create(user=user, recipe=recipe)
+    response = client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.data['favorites_count'] == 1
+
+
+def test_recipe_delete_queries_do_not_grow_with_favorites(
+    django_user_model, author, make_recipes
+):
+    queries = []
+    for fans in (1, 30):
+        recipe, = make_recipes(author, 1)
+        for i in range(fans):
+            fan = django_user_model.objects.create(
+                username=f'fan-{fans}-{i}', email=f'fan-{fans}-{i}@example.com'
+            )
+            Favorite.objects.create(user=fan, recipe=recipe)
+            ShoppingCart.objects.create(user=fan, recipe=recipe)
+        with CaptureQueriesContext(connection) as captured:
+            recipe.delete()
+        queries.append(len(captured))
+    assert queries[1] == queries[0]
+    assert not Favorite.objects.exists()
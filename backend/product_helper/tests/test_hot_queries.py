@@ -0,0 +1,33 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+
+from recipes.models import IngredientRecipe, TagRecipe
+
+pytestmark = pytest.mark.django_db
+
+
+def test_duplicate_links_are_rejected(author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    link = IngredientRecipe.objects.filter(recipe=recipe).first()
+    tag = TagRecipe.objects.filter(recipe=recipe).first().tag
+    for model, fields in (
+        (IngredientRecipe, {'ingredient_id': link.ingredient_id,
+                            'amount': 1}),
+        (TagRecipe, {'tag': tag}),
+    ):
+        with pytest.raises(IntegrityError), transaction.atomic():
+            model.objects.create(recipe=recipe, **fields)
+
+
+def test_explain_hot_queries(user, author, make_recipes):
+    make_recipes(author, 2)
+    out = StringIO()
+    call_command('explain_hot_queries', user=user.email, stdout=out)
+    output = out.getvalue()
+    assert output.count('-> 200') == 12
+    # Планы SQLite (EXPLAIN QUERY PLAN) и PostgreSQL называют поиск по
+    # индексу по-разному
+    assert ('SEARCH' if connection.vendor == 'sqlite' else 'Index') in output
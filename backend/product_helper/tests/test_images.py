@@ -0,0 +1,61 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.images import build_variants
+from recipes.models import Recipe
+from tests.test_recipe_writes import IMAGE
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipe(settings, tmp_path, author, make_recipes):
+    settings.MEDIA_ROOT = tmp_path
+    buffer = BytesIO()
+    Image.new('RGB', (2000, 1000), 'red').save(buffer, 'PNG')
+    name = default_storage.save(
+        'recipes/images/recipe.png', ContentFile(buffer.getvalue())
+    )
+    recipe, = make_recipes(author, 1)
+    Recipe.objects.filter(pk=recipe.pk).update(image=name)
+    return Recipe.objects.get(pk=recipe.pk)
+
+
+def test_build_variants(settings, client, recipe):
+    url = f'/api/recipes/{recipe.pk}/'
+    assert client.get(url).data['image'].endswith('/recipe.png')
+    build_variants(recipe.pk, recipe.image.name)
+    recipe.refresh_from_db()
+    with default_storage.open(recipe.image_thumbnail.name) as file:
+        assert Image.open(file).size == settings.RECIPE_THUMBNAIL_SIZE
+    with default_storage.open(recipe.image_webp.name) as file:
+        assert Image.open(file).size == (1280, 640)
+    assert client.get(url).data['image'].endswith(recipe.image_webp.name)
+    assert client.get('/api/recipes/').data['results'][0]['image'].endswith(
+        recipe.image_thumbnail.name
+    )
+
+
+def test_build_variants_skips_replaced_image(recipe):
+    Recipe.objects.filter(pk=recipe.pk).update(image='recipes/images/new.png')
+    build_variants(recipe.pk, recipe.image.name)
+    recipe.refresh_from_db()
+    assert not recipe.image_thumbnail
+
+
+def test_new_image_clears_variants(author, recipe):
+    build_variants(recipe.pk, recipe.image.name)
+    client = APIClient()
+    client.force_authenticate(author)
+    response = client.patch(
+        f'/api/recipes/{recipe.pk}/', {'image': IMAGE}, format='json'
+    )
+    assert response.status_code == 200, response.data
+    recipe.refresh_from_db()
+    assert not recipe.image_thumbnail and not recipe.image_webp
+    assert response.data['image'].endswith(recipe.image.name)
@@ -0,0 +1,55 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+
+DATA = {
+    'name': 'Борщ зеленый',
+    'text': 'Строка\u2028абзац\u2029',
+    'amount': Decimal('1.50'),
+    'created': datetime(2021, 5, 1, 12, 30, 15, 123456,
+                        tzinfo=timezone.utc),
+    'day': date(2021, 5, 1),
+    'ids': [1, 2, 3],
+    'nested': {'empty': None, 'flag': True},
+}
+
+
+@pytest.fixture(params=('orjson', 'stdlib'))
+def json_backend(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+
+
+@pytest.mark.parametrize('media_type', (
+    'application/json', 'application/json; indent=4'
+))
+def test_renderer_matches_json_renderer(json_backend, media_type):
+    expected = JSONRenderer().render(DATA, media_type, {})
+    assert renderers.FastJSONRenderer().render(
+        DATA, media_type, {}
+    ) == expected
+
+
+def test_parser_matches_json_parser(json_backend):
+    content = JSONRenderer().render(DATA)
+    assert parsers.FastJSONParser().parse(BytesIO(content)) == (
+        JSONParser().parse(BytesIO(content))
+    )
+
+
+def test_parser_error_matches_json_parser(json_backend):
+    with pytest.raises(ParseError) as expected:
+        JSONParser().parse(BytesIO(b'{"name": }'))
+    with pytest.raises(ParseError) as error:
+        parsers.FastJSONParser().parse(BytesIO(b'{"name": }'))
+    assert str(error.value) == str(expected.value)
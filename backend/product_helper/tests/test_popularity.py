@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipePopularity
+
+pytestmark = pytest.mark.django_db
+
+
+def test_popular_ordering(user, author, client, make_recipes):
+    cold, stale, hot, warm = make_recipes(author, 4)
+    for fan, recipes in ((user, (hot, warm, stale)), (author, (hot,))):
+        for recipe in recipes:
+            Favorite.objects.create(user=fan, recipe=recipe)
+    Favorite.objects.filter(recipe=stale).update(
+        added=timezone.now() - timedelta(days=30)
+    )
+    call_command('refresh_popularity', days=7)
+    assert dict(
+        RecipePopularity.objects.values_list('recipe', 'score')
+    ) == {hot.pk: 2, warm.pk: 1, stale.pk: 0, cold.pk: 0}
+    response = client.get('/api/recipes/?ordering=popular')
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        hot.pk, warm.pk, stale.pk, cold.pk
+    ]
+
+
+def test_popularity_row_for_every_recipe(author, client, make_recipes):
+    created, = make_recipes(author, 1)
+    Recipe.objects.bulk_create([Recipe(
+        author=author, name='Из фикстуры', text='Текст', cooking_time=10,
+        image='recipes/images/recipe.png'
+    )])
+    loaded = Recipe.objects.exclude(pk=created.pk).get()
+    assert list(RecipePopularity.objects.values_list(
+        'recipe', 'score'
+    )) == [(created.pk, 0)]
+    call_command('refresh_popularity')
+    assert RecipePopularity.objects.filter(recipe=loaded).exists()
+    response = client.get('/api/recipes/?ordering=popular')
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        loaded.pk, created.pk
+    ]
+
+
+def test_popular_ordering_rejects_cursor(client):
+    response = client.get('/api/recipes/?ordering=popular&pagination=cursor')
+    assert response.status_code == 400
+    assert response.data == {'pagination': (
+        'Курсорная пагинация упорядочивает по id и несовместима с '
+        'параметрами: ordering'
+    )}
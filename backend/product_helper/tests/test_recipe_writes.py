@@ -0,0 +1,205 @@
+import base64
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.cookable import invalidate_coverage
+from recipes.models import Ingredient, IngredientRecipe, TagRecipe
+
+RECIPES_URL = '/api/recipes/'
+# PNG 1x1
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=='
+)
+LINK_TABLES = (IngredientRecipe._meta.db_table, TagRecipe._meta.db_table)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def make_ingredients():
+    def make_ingredients(count):
+        return [
+            Ingredient.objects.create(
+                name=f'Продукт {i}', measurement_unit='G'
+            )
+            for i in range(count)
+        ]
+    return make_ingredients
+
+
+def payload(tags, amounts, **fields):
+    """Тело запроса рецепта: amounts - {ингредиент: количество}."""
+    return {
+        'name': 'Рецепт', 'text': 'Текст', 'cooking_time': 10,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': amount}
+            for ingredient, amount in amounts.items()
+        ],
+        **fields
+    }
+
+
+def link_writes(queries):
+    """INSERT, UPDATE и DELETE строк IngredientRecipe и TagRecipe.
+
+    Таблицу запроса определяет его начало: на PostgreSQL UPDATE
+    поискового документа рецепта читает IngredientRecipe подзапросом.
+    """
+    writes = tuple(
+        f'{command} "{table}"' for table in LINK_TABLES
+        for command in ('INSERT INTO', 'UPDATE', 'DELETE FROM')
+    )
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith(writes)
+    ]
+
+
+def create_recipe(client, tags, amounts):
+    response = client.post(
+        RECIPES_URL, payload(tags, amounts, image=IMAGE), format='json'
+    )
+    assert response.status_code == 201, response.data
+    return response.data['id']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (2, 20))
+def test_create_writes_links_in_bulk(count, user_client, tags,
+                                     make_ingredients):
+    amounts = {ingredient: 5 for ingredient in make_ingredients(count)}
+    with CaptureQueriesContext(connection) as queries:
+        pk = create_recipe(user_client, tags, amounts)
+    # Одна вставка тэгов и одна вставка ингредиентов
+    assert len(link_writes(queries)) == 2
+    assert IngredientRecipe.objects.filter(recipe_id=pk).count() == count
+
+
+@pytest.mark.django_db
+def test_update_without_changes_writes_no_links(user_client, tags,
+                                                make_ingredients):
+    amounts = {ingredient: 5 for ingredient in make_ingredients(10)}
+    pk = create_recipe(user_client, tags, amounts)
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.patch(
+            f'{RECIPES_URL}{pk}/', payload(tags, amounts), format='json'
+        )
+    assert response.status_code == 200
+    assert link_writes(queries) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (3, 30))
+def test_update_writes_only_the_diff(count, user_client, tags,
+                                     make_ingredients):
+    removed, changed, kept, *rest = make_ingredients(count + 1)
+    added = rest.pop()
+    amounts = {ingredient: 5 for ingredient in (removed, changed, kept, *rest)}
+    pk = create_recipe(user_client, tags, amounts)
+    del amounts[removed]
+    amounts[changed] = 7
+    amounts[added] = 3
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.patch(
+            f'{RECIPES_URL}{pk}/', payload(tags[:1], amounts), format='json'
+        )
+    assert response.status_code == 200
+    # DELETE ингредиента и тэгов, UPDATE количества, INSERT ингредиента
+    writes = link_writes(queries)
+    assert sorted(sql.split()[0] for sql in writes) == [
+        'DELETE', 'DELETE', 'INSERT', 'UPDATE'
+    ]
+    assert {
+        row['id']: row['amount'] for row in response.data['ingredients']
+    } == {ingredient.pk: amount for ingredient, amount in amounts.items()}
+    assert [tag['id'] for tag in response.data['tags']] == [tags[0].pk]
+
+
+@pytest.mark.django_db
+def test_create_queries_do_not_grow_with_ids(user_client, tags,
+                                             make_ingredients,
+                                             count_queries):
+    ingredients = make_ingredients(20)
+    # Строку версии индекса покрытия создает первый рецепт в базе
+    invalidate_coverage()
+    counts = []
+    for count in (1, 20):
+        amounts = {ingredient: 5 for ingredient in ingredients[:count]}
+        response, queries = count_queries(
+            user_client, 'post', RECIPES_URL,
+            payload(tags[:count], amounts, image=IMAGE)
+        )
+        assert response.status_code == 201
+        counts.append(queries)
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_bad_ids_in_one_error(user_client, tags, make_ingredients):
+    first, second = make_ingredients(2)
+    body = payload(tags, {first: 5, second: 5}, image=IMAGE)
+    body['tags'] += [998, 999]
+    body['ingredients'] += [
+        {'id': 997, 'amount': 1}, {'id': first.pk, 'amount': 1},
+        {'id': first.pk, 'amount': 2}
+    ]
+    response = user_client.post(RECIPES_URL, body, format='json')
+    assert response.status_code == 400
+    assert response.json() == {
+        'tags': ['Объекты с id 998, 999 не найдены'],
+        'ingredients': [f'Повторяющиеся id: {first.pk}'],
+    }
+    body['ingredients'].pop()
+    body['ingredients'].pop()
+    body['ingredients'].append({'id': 996, 'amount': 1})
+    response = user_client.post(RECIPES_URL, body, format='json')
+    assert response.json()['ingredients'] == [
+        'Объекты с id 997, 996 не найдены'
+    ]
+
+
+@pytest.mark.django_db
+def test_oversized_image_rejected(settings, user_client, tags, ingredients):
+    settings.RECIPE_IMAGE_MAX_BYTES = 1024
+    image = 'data:image/png;base64,' + 'A' * 2048
+    response = user_client.post(
+        RECIPES_URL, payload(tags, {ingredients[0]: 1}, image=image),
+        format='json'
+    )
+    assert response.status_code == 400
+    assert response.data == {
+        'image': ['Размер изображения больше 1024 байт']
+    }
+
+
+@pytest.mark.django_db
+def test_oversized_body_rejected(settings, user_client, tags, ingredients):
+    settings.API_MAX_BODY_BYTES = 1024
+    response = user_client.post(
+        RECIPES_URL,
+        payload(tags, {ingredients[0]: 1}, image=IMAGE, text='Т' * 1024),
+        format='json'
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.django_db
+def test_create_from_multipart(user_client, tags, ingredients):
+    image = SimpleUploadedFile(
+        'recipe.png', base64.b64decode(IMAGE.split(',')[1])
+    )
+    response = user_client.post(RECIPES_URL, {
+        'data': json.dumps(payload(tags, {ingredients[0]: 1})),
+        'image': image,
+    }, format='multipart')
+    assert response.status_code == 201, response.data
+    assert response.data['image'].endswith('.png')
@@ -0,0 +1,228 @@
+import pytest
+
+from recipes import filters
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            ShoppingCart, TagRecipe)
+from users.models import Subscribtion
+
+RECIPES_URL = '/api/recipes/'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_list_queries_do_not_grow_with_page(
+    authenticated, client, user_client, author, make_recipes, count_queries
+):
+    client = user_client if authenticated else client
+    make_recipes(author, 1)
+    _, one = count_queries(client, 'get', RECIPES_URL)
+    make_recipes(author, 20)
+    response, page = count_queries(client, 'get', RECIPES_URL)
+    assert response.status_code == 200
+    assert len(response.data['results']) > 1
+    assert page == one
+    response, cursor = count_queries(
+        client, 'get', f'{RECIPES_URL}?pagination=cursor&limit=20'
+    )
+    assert len(response.data['results']) == 20
+    assert cursor <= one
+
+
+@pytest.mark.django_db
+def test_cursor_pages_walk_all_recipes(client, author, make_recipes):
+    recipes = make_recipes(author, 7)
+    url, ids = f'{RECIPES_URL}?pagination=cursor&limit=3', []
+    while url:
+        response = client.get(url)
+        assert 'count' not in response.data
+        ids += [recipe['id'] for recipe in response.data['results']]
+        url = response.data['next']
+    assert ids == sorted((recipe.pk for recipe in recipes), reverse=True)
+
+
+@pytest.mark.django_db
+def test_list_flags_come_from_annotations(
+    user, user_client, author, make_recipes
+):
+    favorite, in_cart, other = make_recipes(author, 3)
+    Favorite.objects.create(user=user, recipe=favorite)
+    ShoppingCart.objects.create(user=user, recipe=in_cart)
+    Subscribtion.objects.create(user=user, author=author)
+    response = user_client.get(RECIPES_URL)
+    flags = {
+        recipe['id']: (
+            recipe['is_favorited'], recipe['is_in_shopping_cart'],
+            recipe['author']['is_subscribed']
+        )
+        for recipe in response.data['results']
+    }
+    assert flags == {
+        favorite.pk: (True, False, True),
+        in_cart.pk: (False, True, True),
+        other.pk: (False, False, True),
+    }
+
+
+@pytest.mark.django_db
+def test_viewer_flags_add_no_queries(
+    client, user_client, author, make_recipes, count_queries
+):
+    make_recipes(author, 6)
+    # Первый запрос заполняет кэш ингредиентов и тэгов рецептов
+    client.get(RECIPES_URL)
+    _, anonymous = count_queries(client, 'get', RECIPES_URL)
+    response, authenticated = count_queries(user_client, 'get', RECIPES_URL)
+    assert len(response.data['results']) == 6
+    assert authenticated == anonymous
+
+
+def add_ingredients(recipe, count):
+    # create(), а не bulk_create(): сигнал обновит рецепт и ключ кэша
+    for i in range(count):
+        IngredientRecipe.objects.create(
+            recipe=recipe, amount=1, ingredient=Ingredient.objects.create(
+                name=f'{recipe.pk}-{i}', measurement_unit='G'
+            )
+        )
+
+
+@pytest.fixture(params=(True, False), ids=('rows', 'serializer'))
+def fast_serialization(request, settings):
+    settings.RECIPE_FAST_SERIALIZATION = request.param
+
+
+@pytest.mark.django_db
+def test_list_queries_do_not_grow_with_ingredients(
+    fast_serialization, user_client, author, make_recipes, count_queries
+):
+    recipes = make_recipes(author, 6)
+    _, before = count_queries(user_client, 'get', RECIPES_URL)
+    for recipe in recipes:
+        add_ingredients(recipe, 5)
+    response, after = count_queries(user_client, 'get', RECIPES_URL)
+    assert len(response.data['results'][0]['ingredients']) == 8
+    assert after == before
+
+
+@pytest.mark.django_db
+def test_retrieve_queries_do_not_grow_with_ingredients(
+    fast_serialization, user_client, author, make_recipes, count_queries
+):
+    small, large = make_recipes(author, 2)
+    add_ingredients(large, 10)
+    response, small_queries = count_queries(
+        user_client, 'get', f'{RECIPES_URL}{small.pk}/'
+    )
+    assert response.status_code == 200
+    response, large_queries = count_queries(
+        user_client, 'get', f'{RECIPES_URL}{large.pk}/'
+    )
+    assert len(response.data['ingredients']) == 13
+    assert large_queries == small_queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('action', ('favorite', 'shopping_cart'))
+def test_toggle_queries_do_not_grow_with_ingredients(
+    action, user_client, author, make_recipes, count_queries
+):
+    small, large = make_recipes(author, 2)
+    add_ingredients(large, 10)
+    counts = []
+    for recipe in (small, large):
+        url = f'{RECIPES_URL}{recipe.pk}/{action}/'
+        response, added = count_queries(user_client, 'post', url)
+        assert response.status_code == 200
+        response, removed = count_queries(user_client, 'delete', url)
+        assert response.status_code == 204
+        counts.append((added, removed))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.django_db
+def test_tags_filter_returns_each_recipe_once(client, author, make_recipes):
+    tagged, untagged = make_recipes(author, 2)
+    TagRecipe.objects.filter(recipe=untagged).delete()
+    response = client.get(f'{RECIPES_URL}?tags=tag-0&tags=tag-1')
+    assert response.data['count'] == 1
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        tagged.pk
+    ]
+    response = client.get(f'{RECIPES_URL}?tags=unknown')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_tags_filter_skips_tag_deleted_after_validation(
+    client, author, tags, make_recipes, monkeypatch
+):
+    recipe, = make_recipes(author, 1)
+    # Проверка видит справочник до удаления тэга
+    monkeypatch.setitem(
+        filters.RecipeFilter.base_filters['tags'].extra, 'choices',
+        [(tag.slug, tag.slug) for tag in tags]
+    )
+    tags[0].delete()
+    response = client.get(f'{RECIPES_URL}?tags=tag-0&tags=tag-1')
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data['results']] == [recipe.pk]
+
+
+@pytest.mark.django_db
+def test_list_modes_render_same_body(
+    settings, user, user_client, author, make_recipes
+):
+    favorite, _ = make_recipes(author, 2)
+    Favorite.objects.create(user=user, recipe=favorite)
+    Subscribtion.objects.create(user=user, author=author)
+    add_ingredients(favorite, 2)
+    bodies = []
+    for fast in (True, False):
+        settings.RECIPE_FAST_SERIALIZATION = fast
+        response = user_client.get(RECIPES_URL)
+        bodies.append((response.content, response['ETag']))
+    assert bodies[0] == bodies[1]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ('list', 'detail'))
+def test_renamed_ingredient_and_tag_are_shown(
+    url, client, author, tags, ingredients, make_recipes
+):
+    recipe, = make_recipes(author, 1)
+    url = RECIPES_URL if url == 'list' else f'{RECIPES_URL}{recipe.pk}/'
+
+    def names():
+        response = client.get(url)
+        data = response.data
+        data = data['results'][0] if 'results' in data else data
+        return (
+            {ingredient['name'] for ingredient in data['ingredients']},
+            {tag['name'] for tag in data['tags']},
+            response['ETag']
+        )
+
+    _, _, etag = names()
+    ingredients[0].name = 'Мука'
+    ingredients[0].save()
+    tags[0].name = 'Завтрак'
+    tags[0].save()
+    ingredient_names, tag_names, new_etag = names()
+    assert ingredient_names == {'Мука', 'Ингредиент 1', 'Ингредиент 2'}
+    assert tag_names == {'Завтрак', 'Тэг 1', 'Тэг 2'}
+    assert new_etag != etag
+
+
+@pytest.mark.django_db
+def test_deleted_ingredient_and_tag_are_dropped(
+    client, author, tags, ingredients, make_recipes
+):
+    recipe, = make_recipes(author, 1)
+    url = f'{RECIPES_URL}{recipe.pk}/'
+    etag = client.get(url)['ETag']
+    ingredients[0].delete()
+    tags[0].delete()
+    response = client.get(url)
+    assert response['ETag'] != etag
+    assert len(response.data['ingredients']) == 2
+    assert len(response.data['tags']) == 2
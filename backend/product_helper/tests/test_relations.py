@@ -0,0 +1,80 @@
+import pytest
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribtion, UserStats
+
+# Тесты вне транзакции теста, как в работе: atomic() переключателей
+# иначе добавил бы SAVEPOINT и RELEASE SAVEPOINT
+pytestmark = pytest.mark.django_db(transaction=True)
+
+# Проверка связи, INSERT или DELETE, UPDATE счетчика и BEGIN, который
+# SQLite выполняет отдельным запросом
+TOGGLE_MAX_QUERIES = 4
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    return make_recipes(author, 1)[0]
+
+
+@pytest.mark.parametrize('action, model, counter', (
+    ('favorite', Favorite, 'favorites_count'),
+    ('shopping_cart', ShoppingCart, 'carts_count'),
+))
+def test_recipe_toggle_queries(
+    action, model, counter, user, user_client, recipe,
+    django_assert_max_num_queries
+):
+    url = f'/api/recipes/{recipe.pk}/{action}/'
+    for _ in range(2):
+        with django_assert_max_num_queries(TOGGLE_MAX_QUERIES):
+            response = user_client.post(url)
+        assert response.status_code == 200
+        assert response.data['id'] == recipe.pk
+    assert model.objects.filter(user=user, recipe=recipe).count() == 1
+    assert getattr(Recipe.objects.get(pk=recipe.pk), counter) == 1
+    for _ in range(2):
+        with django_assert_max_num_queries(TOGGLE_MAX_QUERIES):
+            response = user_client.delete(url)
+        assert response.status_code == 204
+    assert not model.objects.filter(user=user, recipe=recipe).exists()
+    assert getattr(Recipe.objects.get(pk=recipe.pk), counter) == 0
+
+
+def test_relation_not_saved_without_counter(user, user_client, recipe,
+                                            monkeypatch):
+    def fail(*args):
+        raise RuntimeError
+    monkeypatch.setattr('recipes.signals.change_counter', fail)
+    with pytest.raises(RuntimeError):
+        user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert not Favorite.objects.filter(user=user, recipe=recipe).exists()
+
+
+def test_shopping_cart_readd_updates_servings(user, user_client, recipe):
+    url = f'/api/recipes/{recipe.pk}/shopping_cart/'
+    user_client.post(url, {'servings': 2}, format='json')
+    user_client.post(url, {'servings': 5}, format='json')
+    assert ShoppingCart.objects.get(user=user, recipe=recipe).servings == 5
+    assert Recipe.objects.get(pk=recipe.pk).carts_count == 1
+
+
+def test_subscribe_queries(
+    user, user_client, author, recipe, django_assert_max_num_queries
+):
+    url = f'/api/users/{author.pk}/subscribe/?recipes_limit=1'
+    for _ in range(2):
+        with django_assert_max_num_queries(TOGGLE_MAX_QUERIES):
+            response = user_client.post(url)
+        assert response.status_code == 200
+        assert response.data['is_subscribed']
+        assert [item['id'] for item in response.data['recipes']] == [
+            recipe.pk
+        ]
+    assert UserStats.objects.get(user=author).followers_count == 1
+    for _ in range(2):
+        with django_assert_max_num_queries(TOGGLE_MAX_QUERIES):
+            response = user_client.delete(url)
+        assert response.status_code == 204
+    assert not Subscribtion.objects.filter(user=user, author=author).exists()
+    assert UserStats.objects.get(user=author).followers_count == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from recipes import autocomplete
+from recipes.models import Ingredient, Recipe
+from recipes.search import update_search_documents
+
+pytestmark = pytest.mark.django_db
+
+SEARCH_URL = '/api/recipes/?search={}'
+
+
+@pytest.fixture
+def recipes(author, make_recipes):
+    named, in_text, other = make_recipes(author, 3)
+    Recipe.objects.filter(pk=named.pk).update(name='Борщ зеленый')
+    Recipe.objects.filter(pk=in_text.pk).update(text='Подавать как борщ')
+    update_search_documents(Recipe.objects.all())
+    return named, in_text, other
+
+
+def found(client, value):
+    response = client.get(SEARCH_URL.format(value))
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.data['results']]
+
+
+def test_search_ranks_name_above_text(client, recipes):
+    named, in_text, _ = recipes
+    assert found(client, 'Борщ') == [named.pk, in_text.pk]
+    assert found(client, 'борщ зеленый') == [named.pk]
+    assert found(client, 'солянка') == []
+
+
+def test_search_matches_ingredient_names(client, recipes):
+    assert len(found(client, 'ингредиент')) == len(recipes)
+
+
+def test_in_order_caps_ids(recipes, monkeypatch):
+    monkeypatch.setattr(autocomplete, 'IN_ORDER_MAX_IDS', 2)
+    ids = [recipe.pk for recipe in reversed(recipes)]
+    assert list(autocomplete.in_order(
+        Recipe.objects.all(), ids
+    ).values_list('pk', flat=True)) == ids[:2]
+
+
+def test_search_rejects_cursor(client):
+    response = client.get(SEARCH_URL.format('борщ') + '&pagination=cursor')
+    assert response.status_code == 400
+    assert 'search' in response.data['pagination']
+
+
+def test_ingredient_rename_updates_recipes(client, recipes, ingredients):
+    named = Recipe.objects.get(pk=recipes[0].pk)
+    ingredient = Ingredient.objects.get(pk=ingredients[0].pk)
+    ingredient.save()
+    assert Recipe.objects.get(pk=named.pk).updated_at == named.updated_at
+    ingredient.name = 'Щавель'
+    ingredient.save()
+    assert Recipe.objects.get(pk=named.pk).updated_at > named.updated_at
+    assert len(found(client, 'щавель')) == len(recipes)
@@ -0,0 +1,59 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe
+from recipes.renderers import pdf_font
+from recipes.shopping import shopping_list, shopping_list_lines
+
+pytestmark = pytest.mark.django_db
+
+
+def test_shopping_list_scales_and_converts(
+    user, user_client, author, make_recipes
+):
+    flour = Ingredient.objects.create(name='Мука', measurement_unit='KG')
+    salt = Ingredient.objects.create(name='Соль', measurement_unit='BS')
+    first, second = make_recipes(author, 2)
+    IngredientRecipe.objects.filter(recipe__in=(first, second)).delete()
+    IngredientRecipe.objects.create(recipe=first, ingredient=flour, amount=1)
+    IngredientRecipe.objects.create(recipe=first, ingredient=salt, amount=1)
+    IngredientRecipe.objects.create(recipe=second, ingredient=flour, amount=2)
+    response = user_client.post(
+        f'/api/recipes/{first.pk}/shopping_cart/', {'servings': 3},
+        format='json'
+    )
+    assert response.status_code == 200
+    user_client.post(f'/api/recipes/{second.pk}/shopping_cart/')
+    assert list(shopping_list_lines(shopping_list(user))) == [
+        {'name': 'Мука', 'amount': 5000, 'unit': 'г'},
+        {'name': 'Соль', 'amount': 9, 'unit': 'ч. л.'},
+    ]
+
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+def test_download_formats(user, user_client, author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    user_client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    response = user_client.get(DOWNLOAD_URL, {'format': 'txt'})
+    assert response.streaming
+    assert b''.join(response.streaming_content).decode().splitlines()[1:] == [
+        'Ингредиент 0, 5, г', 'Ингредиент 1, 5, г', 'Ингредиент 2, 5, г'
+    ]
+    pytest.importorskip('reportlab')
+    response = user_client.get(DOWNLOAD_URL, {'format': 'pdf'})
+    assert response.status_code == 200
+    assert not response.streaming
+    assert response.content.startswith(b'%PDF')
+
+
+def test_download_pdf_without_font(user_client, settings):
+    pytest.importorskip('reportlab')
+    settings.SHOPPING_CART_PDF_FONT = '/nonexistent/font.ttf'
+    pdf_font.cache_clear()
+    try:
+        response = user_client.get(DOWNLOAD_URL, {'format': 'pdf'})
+    finally:
+        pdf_font.cache_clear()
+    assert response.status_code == 500
+    assert response.json() == {'detail': 'Шрифт для PDF недоступен'}
@@ -0,0 +1,92 @@
+from itertools import count, islice
+
+import pytest
+
+from users.models import Subscribtion, UserStats
+
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+@pytest.fixture
+def follow(user, django_user_model, make_recipes):
+    """Подписывает user на authors_count новых авторов с recipes рецептами."""
+    numbers = count()
+
+    def follow(authors_count, recipes=3):
+        authors = []
+        for i in islice(numbers, authors_count):
+            author = django_user_model.objects.create(
+                username=f'author-{i}', email=f'author-{i}@example.com'
+            )
+            make_recipes(author, recipes)
+            Subscribtion.objects.create(user=user, author=author)
+            authors.append(author)
+        return authors
+    return follow
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', (
+    '?recipes_limit=2',
+    '?pagination=cursor&limit=50&recipes_limit=2',
+    '?pagination=cursor&limit=50',
+))
+def test_feed_queries_do_not_grow_with_authors(
+    query, user_client, follow, count_queries
+):
+    follow(1)
+    _, one = count_queries(user_client, 'get', SUBSCRIPTIONS_URL + query)
+    follow(49)
+    response, fifty = count_queries(
+        user_client, 'get', SUBSCRIPTIONS_URL + query
+    )
+    assert response.status_code == 200
+    assert len(response.data['results']) > 1
+    assert fifty == one
+
+
+@pytest.mark.django_db
+def test_feed_limits_recipes_and_counts_all(user_client, follow):
+    follow(50)
+    response = user_client.get(
+        SUBSCRIPTIONS_URL + '?pagination=cursor&limit=50&recipes_limit=2'
+    )
+    authors = response.data['results']
+    assert len(authors) == 50
+    for author in authors:
+        assert author['is_subscribed']
+        assert author['recipes_count'] == 3
+        assert len(author['recipes']) == 2
+        ids = [recipe['id'] for recipe in author['recipes']]
+        assert ids == sorted(ids, reverse=True)
+
+
+@pytest.mark.django_db
+def test_recipes_count_without_stats_row(user_client, follow, count_queries):
+    follow(1)
+    _, with_stats = count_queries(user_client, 'get', SUBSCRIPTIONS_URL)
+    authors = follow(2)
+    # Как после loaddata: строк счетчиков у авторов нет
+    UserStats.objects.filter(user__in=authors).delete()
+    response, without_stats = count_queries(
+        user_client, 'get', SUBSCRIPTIONS_URL
+    )
+    assert without_stats == with_stats
+    assert [
+        author['recipes_count'] for author in response.data['results']
+    ] == [3, 3, 3]
+    response = user_client.post(f'/api/users/{authors[0].pk}/subscribe/')
+    assert response.data['recipes_count'] == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('recipes_limit', ('abc', '-1'))
+def test_invalid_recipes_limit_is_ignored(recipes_limit, user_client, follow):
+    author, = follow(1)
+    query = f'?recipes_limit={recipes_limit}'
+    response = user_client.get(SUBSCRIPTIONS_URL + query)
+    assert response.status_code == 200
+    assert len(response.data['results'][0]['recipes']) == 3
+    response = user_client.post(f'/api/users/{author.pk}/subscribe/{query}')
+    assert response.status_code == 200
+    assert len(response.data['recipes']) == 3
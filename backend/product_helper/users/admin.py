@@ -1,13 +1,32 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
 
-from .models import Subscribtion
+from recipes.admin import RecountOnDeleteMixin
+from recipes.counters import refresh_user_counters
+from .models import Subscribtion, UserStats
 
+User = get_user_model()
 
-class SubscribtionAdmin(admin.ModelAdmin):
+
+class SubscribtionAdmin(RecountOnDeleteMixin, admin.ModelAdmin):
     list_display = ('user', 'author')
     search_fields = ('user', 'author')
     list_filter = ('user', 'author')
     empty_value_display = '-пусто-'
+    counted_field = 'author'
+
+    def refresh_counters(self, ids):
+        refresh_user_counters(User.objects.filter(pk__in=ids))
 
 
 admin.site.register(Subscribtion, SubscribtionAdmin)
+
+
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipes_count', 'followers_count')
+    search_fields = ('user__username', 'user__email')
+    readonly_fields = ('recipes_count', 'followers_count')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(UserStats, UserStatsAdmin)
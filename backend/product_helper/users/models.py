@@ -5,12 +5,14 @@ User = get_user_model()
 
 
 class Subscribtion(models.Model):
+    # Индекс по user - первая колонка unique_subscription
     user = models.ForeignKey(
         User,
         verbose_name='Подписки',
         on_delete=models.CASCADE,
         related_name='subsctiptions',
-        help_text='Подписки пользователя'
+        help_text='Подписки пользователя',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -34,3 +36,32 @@ class Subscribtion(models.Model):
         res = 'Подписка {user} на {author}'
         return res.format(user=self.user.username,
                           author=self.author.username)
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        help_text='Владелец счетчиков'
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов',
+        default=0,
+        help_text='Количество рецептов автора'
+    )
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        help_text='Количество подписчиков автора'
+    )
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+    def __str__(self):
+        res = 'Счетчики {user}'
+        return res.format(user=self.user.username)
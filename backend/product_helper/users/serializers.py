@@ -1,17 +1,24 @@
 from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
-from recipes.models import Recipe
+from recipes.fields import RecipeImageField
+from recipes.models import RECIPE_CARD_FIELDS, Recipe
 from rest_framework import serializers
-from rest_framework.exceptions import ParseError
-
-from .models import Subscribtion
 
 User = get_user_model()
 
 
+def get_recipes_limit(request):
+    """Неотрицательный recipes_limit из запроса, иначе None."""
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return None
+    return limit if limit >= 0 else None
+
+
 class SimpleRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(
+    image = RecipeImageField(
+        variant='image_thumbnail',
         max_length=None,
         use_url=True,
         required=False
@@ -36,6 +43,9 @@ class CustomUserSerializer(UserSerializer):
                   'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
+        subscribed = getattr(obj, 'is_subscribed', None)
+        if subscribed is not None:
+            return subscribed
         current_user = self.context['request'].user
         return (not current_user.is_anonymous and
                 current_user.subsctiptions.filter(
@@ -53,38 +63,24 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 
 
 class UserSubscriptionSerializer(CustomUserSerializer):
-    recipes = SimpleRecipeSerializer(many=True)
-    recipes_count = serializers.SerializerMethodField()
+    recipes = serializers.SerializerMethodField()
+    # Аннотация author_recipes_count() из CustomUserViewSet
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         fields = ('email', 'id', 'username', 'first_name', 'last_name',
                   'is_subscribed', 'recipes_count', 'recipes')
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_recipes(self, obj):
-        recipes = obj.recipes.all()
-        params = self.context['request'].query_params
-        limit = params.get('recipes_limit')
-        if limit:
-            recipes = recipes[:int(limit)]
-        return SimpleRecipeSerializer(obj, many=True).data
-
-
-class SubscribeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Subscribtion
-        fields = '__all__'
-
-    def validate(self, attrs):
-        author = attrs.get('author')
-        user = attrs.get('user')
-        if user == author:
-            raise ParseError(detail='Нельзя подписаться на самого себя.')
-        return attrs
-
-    def to_representation(self, obj):
-        return UserSubscriptionSerializer(
-            obj.subscription, context=self.context).data
+        # recent_recipes - Prefetch из CustomUserViewSet.subscriptions,
+        # уже ограниченный recipes_limit
+        recipes = getattr(obj, 'recent_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.only(*RECIPE_CARD_FIELDS)
+            limit = get_recipes_limit(self.context['request'])
+            if limit is not None:
+                recipes = recipes[:limit]
+        return SimpleRecipeSerializer(
+            recipes, many=True, context=self.context
+        ).data
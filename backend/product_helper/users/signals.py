@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.counters import (change_user_counter, deleting_users,
+                              release_user_counters)
+from .models import Subscribtion, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Subscribtion)
+def increment_followers_count(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.author_id, 'followers_count', 1)
+
+
+@receiver(pre_delete, sender=User)
+def release_counters(instance, **kwargs):
+    deleting_users.ids.add(instance.pk)
+    release_user_counters(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(instance, **kwargs):
+    deleting_users.ids.discard(instance.pk)
@@ -1,28 +1,41 @@
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Prefetch, Value
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.conf import settings
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from .models import Subscribtion
+from api.pagination import OptionalCursorPaginationMixin
+from api.relations import RelationToggle
+from recipes.counters import author_recipes_count
+from recipes.models import RECIPE_CARD_FIELDS, Recipe
+from .models import Subscribtion, UserStats
 from .serializers import (CustomUserCreateSerializer, CustomUserSerializer,
-                          SubscribeSerializer, UserSubscriptionSerializer)
+                          UserSubscriptionSerializer, get_recipes_limit)
 
 User = get_user_model()
 
+# Колонки автора для UserSubscriptionSerializer
+AUTHOR_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
 
-class CustomUserViewSet(UserViewSet):
+subscription_relation = RelationToggle(
+    Subscribtion, 'author', UserStats, 'followers_count'
+)
+
+
+class CustomUserViewSet(OptionalCursorPaginationMixin, UserViewSet):
     filter_backends = (DjangoFilterBackend,)
+    cursor_pagination_actions = ('subscriptions',)
 
     def get_serializer_class(self):
         if self.action in ('subscriptions', 'subscribe'):
             return UserSubscriptionSerializer
-        elif self.action == 'subscribe':
-            return SubscribeSerializer
         elif self.action == 'create':
             return CustomUserCreateSerializer
         return CustomUserSerializer
@@ -66,11 +79,21 @@ class CustomUserViewSet(UserViewSet):
             url_path='subscriptions',
             permission_classes=(IsAuthenticated,))
     def subscriptions(self, request, *args, **kwargs):
-        # TODO: наверняка можно по-красивее сделать
-        subscriptions = User.objects.filter(followers__user=request.user).all()
+        recipes = Recipe.objects.only(*RECIPE_CARD_FIELDS, 'author_id')
+        limit = get_recipes_limit(self.request)
+        if limit is not None:
+            recipes = recipes.latest_per_author(limit)
+        subscriptions = User.objects.filter(
+            followers__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+            recipes_count=author_recipes_count()
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recent_recipes')
+        ).order_by('id')
         page = self.paginate_queryset(subscriptions)
         serializer = self.get_serializer_class()(
-            subscriptions,
+            subscriptions if page is None else page,
             context={'request': request},
             many=True
         )
@@ -82,22 +105,45 @@ class CustomUserViewSet(UserViewSet):
             url_path=r'(?P<id>\d+)/subscribe',
             permission_classes=(IsAuthenticated,))
     def subscribe(self, request, *args, **kwargs):
-        # TODO: наверняка можно по-красивее сделать
-        author = get_object_or_404(User, id=self.kwargs.get('id'))
-        if request.method == 'POST':
-            data = {
-                'author': author.id,
-                'user': request.user.id
-            }
-            request.data.update(data)
-            serializer = SubscribeSerializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return self.retrieve(request)
+        author_id = int(self.kwargs['id'])
+        if request.method == 'DELETE':
+            if not subscription_relation.remove(request.user, (author_id,)):
+                get_object_or_404(User.objects.only('id'), id=author_id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if author_id == request.user.id:
+            raise ParseError(detail='Нельзя подписаться на самого себя.')
+        author = self.get_subscription_author(author_id)
+        if not author.is_subscribed:
+            subscription_relation.add(request.user, (author_id,))
+            author.is_subscribed = True
+        return Response(self.get_serializer(author).data)
 
-        subscription = get_object_or_404(
-            Subscribtion,
-            user=request.user,
-            author=author)
-        subscription.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    def get_subscription_author(self, author_id):
+        """Автор со счетчиками, флагом подписки и последними рецептами
+        (recent_recipes) одним запросом: LEFT JOIN рецептов автора."""
+        limit = get_recipes_limit(self.request)
+        rows = User.objects.filter(id=author_id).annotate(
+            is_subscribed=subscription_relation.exists(self.request.user),
+            recipes_count=author_recipes_count()
+        ).values(
+            *AUTHOR_FIELDS, 'is_subscribed', 'recipes_count',
+            *(f'recipes__{field}' for field in RECIPE_CARD_FIELDS)
+        ).order_by('-recipes__id')
+        if limit is not None:
+            # Строка автора нужна и без рецептов
+            rows = rows[:max(limit, 1)]
+        rows = list(rows)
+        if not rows:
+            raise Http404
+        first = rows[0]
+        author = User(**{field: first[field] for field in AUTHOR_FIELDS})
+        author.is_subscribed = first['is_subscribed']
+        author.recipes_count = first['recipes_count']
+        author.recent_recipes = [
+            Recipe(author=author, **{
+                field: row[f'recipes__{field}']
+                for field in RECIPE_CARD_FIELDS
+            })
+            for row in rows if row['recipes__id'] is not None
+        ][:limit]
+        return author